@@ -0,0 +1,115 @@
+"""
+Compare metacsv.read_csv parsing engines on a generated metacsv file
+
+Usage::
+
+    python benchmarks/bench_read_csv.py [nrows]
+
+Times the default engine selection against the pure-python engine that
+read_csv used unconditionally in earlier releases, a read of a small
+window of rows with and without a sidecar row index, and a read from the
+binary cache when pyarrow is installed.
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    with_statement,
+    unicode_literals,
+)
+
+import os
+import sys
+import shutil
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import metacsv
+
+try:
+    import pyarrow  # noqa: F401
+
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def make_file(fp, nrows):
+    np.random.seed(1)
+    df = metacsv.DataFrame(
+        {
+            "region": np.random.choice(["USA", "CAN", "MEX", "BRA"], nrows),
+            "year": np.random.randint(1950, 2100, nrows),
+            "pop": np.random.random(nrows) * 1000,
+            "gdp": np.random.random(nrows) * 1e5,
+        },
+        attrs={"author": "benchmark", "version": "bench.0"},
+        variables={
+            "pop": {"description": "Population", "unit": "millions"},
+            "gdp": {"description": "Product", "unit": "2005 $Bn"},
+        },
+    )
+    df.to_csv(fp, index=False)
+
+
+def time_read(fp, repeat=3, **kwargs):
+    return min(
+        timeit.repeat(lambda: metacsv.read_csv(fp, **kwargs), number=1, repeat=repeat)
+    )
+
+
+def main(nrows=1000000):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fp = os.path.join(tmpdir, "bench.csv")
+        make_file(fp, nrows)
+
+        results = [("python", time_read(fp, engine="python"))]
+        results.append(("default", time_read(fp)))
+
+        pandas_version = tuple(int(v) for v in pd.__version__.split(".")[:2])
+        if pandas_version >= (1, 4) and HAS_PYARROW:
+            results.append(("pyarrow", time_read(fp, engine="pyarrow")))
+
+        baseline = results[0][1]
+        print("read_csv, {:,} rows".format(nrows))
+        for engine, seconds in results:
+            print(
+                "    {: <10} {:8.3f}s  {:6.1f}x".format(
+                    engine, seconds, baseline / seconds
+                )
+            )
+
+        window = slice(nrows // 2, nrows // 2 + 100)
+        scan = time_read(fp, rows=window)
+        metacsv.build_index(fp, block_rows=10000)
+        indexed = time_read(fp, rows=window)
+
+        print("read_csv(rows=slice(n/2, n/2 + 100))")
+        print("    {: <10} {:8.3f}s".format("scan", scan))
+        print(
+            "    {: <10} {:8.3f}s  {:6.1f}x".format("indexed", indexed, scan / indexed)
+        )
+
+        if not HAS_PYARROW:
+            return
+
+        metacsv.read_csv(fp, cache=True)
+        cached = time_read(fp, cache=True)
+        parsed = results[1][1]
+
+        print("read_csv(cache=True)")
+        print("    {: <10} {:8.3f}s".format("parse", parsed))
+        print(
+            "    {: <10} {:8.3f}s  {:6.1f}x".format("cached", cached, parsed / cached)
+        )
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
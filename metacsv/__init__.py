@@ -28,7 +28,30 @@ from metacsv.__about__ import (
 
 from metacsv.core import *
 
-from metacsv.io.parsers import read_header, read_csv, read_pickle
+from metacsv.io.parsers import (
+    read_header,
+    read_csv,
+    read_many,
+    read_pickle,
+    validate_headers,
+)
+
+from metacsv.io.header_cache import HeaderCache
+
+from metacsv.io.sidecar import build_index
+
+from metacsv.io.arrow import read_arrow, to_arrow, from_arrow
+
+from metacsv.io.parquet import read_parquet, to_parquet
+
+from metacsv.io.to_csv import MetaCSVWriter
+
+from metacsv.io.update import update_header, append_csv
+
+import sys as _sys
+
+if _sys.version_info >= (3, 7):
+    from metacsv import aio
 
 from metacsv.io.converters import (
     to_dataset,
@@ -0,0 +1,169 @@
+"""
+asyncio interface to metacsv
+
+Coroutine versions of :py:func:`metacsv.read_csv`,
+:py:func:`metacsv.read_header`, and :py:func:`metacsv.to_csv`. File I/O and
+parsing run in an executor so they never block the event loop, and the
+number of calls in flight on each event loop is bounded by a semaphore, so
+thousands of calls can be awaited at once without queueing thousands of
+executor jobs.
+
+Requires Python 3.7+.
+
+Example
+-------
+
+.. code-block:: python
+
+    >>> import asyncio, glob
+    >>> import metacsv.aio
+    >>>
+    >>> async def headers(paths):
+    ...     return await asyncio.gather(
+    ...         *[metacsv.aio.read_header(p) for p in paths])
+    ...
+    >>> metacsv.aio.configure(concurrency=16)
+    >>> results = asyncio.run(headers(glob.glob('tests/test_data/test*.csv')))
+    >>> attrs, coords, variables = results[0]
+
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    with_statement,
+    unicode_literals,
+)
+
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from .io import parsers, converters
+
+DEFAULT_CONCURRENCY = 64
+
+_config = {"concurrency": DEFAULT_CONCURRENCY, "executor": None, "max_workers": None}
+_owned_executor = None
+_semaphores = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def configure(concurrency=None, executor=None, max_workers=None):
+    """
+    Set the concurrency limit and executor used by the coroutines in this
+    module
+
+    Parameters
+    ----------
+
+    concurrency : int
+
+        Maximum number of calls running or waiting in the executor at once
+        on each event loop (default 64). Further calls wait on the loop
+        without occupying the executor.
+
+    executor : concurrent.futures.Executor
+
+        Executor in which to run file I/O and parsing. By default, a
+        :py:class:`~concurrent.futures.ThreadPoolExecutor` owned by this
+        module is used. Pass a
+        :py:class:`~concurrent.futures.ProcessPoolExecutor` to parse in
+        several processes.
+
+    max_workers : int
+
+        Number of threads of the default executor
+
+    """
+
+    global _owned_executor
+
+    with _lock:
+        if concurrency is not None:
+            if concurrency < 1:
+                raise ValueError("concurrency must be a positive integer")
+            _config["concurrency"] = concurrency
+            _semaphores.clear()
+
+        if executor is not None:
+            _config["executor"] = executor
+
+        if max_workers is not None:
+            _config["max_workers"] = max_workers
+            if _owned_executor is not None:
+                _owned_executor.shutdown(wait=False)
+                _owned_executor = None
+
+
+def _get_executor():
+    global _owned_executor
+
+    if _config["executor"] is not None:
+        return _config["executor"]
+
+    with _lock:
+        if _owned_executor is None:
+            _owned_executor = ThreadPoolExecutor(
+                max_workers=_config["max_workers"], thread_name_prefix="metacsv"
+            )
+        return _owned_executor
+
+
+def _get_semaphore(loop):
+    # semaphores belong to the event loop they are used on
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(_config["concurrency"])
+    return semaphore
+
+
+async def _run(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+
+    async with _get_semaphore(loop):
+        return await loop.run_in_executor(
+            _get_executor(), functools.partial(func, *args, **kwargs)
+        )
+
+
+async def read_header(fp, *args, **kwargs):
+    """
+    Coroutine version of :py:func:`metacsv.read_header`
+
+    fp should be a file path; buffers are read in the executor, so they
+    must not be used by other code while the read is in flight.
+    """
+
+    return await _run(parsers.read_header, fp, *args, **kwargs)
+
+
+async def read_csv(fp, *args, **kwargs):
+    """
+    Coroutine version of :py:func:`metacsv.read_csv`
+
+    ``lazy=True``, ``chunksize``, and ``iterator=True`` are not supported,
+    as the data would be read on the event loop when accessed.
+    """
+
+    if (
+        kwargs.get("lazy")
+        or kwargs.get("chunksize") is not None
+        or kwargs.get("iterator")
+    ):
+        raise ValueError("metacsv.aio.read_csv does not support lazy or chunked reads")
+
+    return await _run(parsers.read_csv, fp, *args, **kwargs)
+
+
+async def to_csv(container, fp, *args, **kwargs):
+    """
+    Coroutine version of :py:func:`metacsv.to_csv`
+
+    The container must not be modified while the write is in flight.
+    """
+
+    return await _run(converters.to_csv, container, fp, *args, **kwargs)
@@ -6,4 +6,4 @@ from __future__ import (
     unicode_literals,
 )
 
-from metacsv.core.containers import Series, DataFrame
+from metacsv.core.containers import Series, DataFrame, LazyContainer
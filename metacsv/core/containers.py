@@ -34,9 +34,17 @@ class Series(Container, pd.Series):
     pandas_parent = pd.Series
     _metadata = ["_coords", "_attrs", "_variables"]
 
-    def copy(self):
+    def copy(self, deep=True):
+        """
+        Copy the container and its attrs, coords, and variables
+
+        With ``deep=False``, the copy shares the underlying data with this
+        container, and only the index, column, and metadata objects are
+        new.
+        """
+
         return Series(
-            self.pandas_parent.copy(self),
+            self.pandas_parent.copy(self, deep=deep),
             coords=self.coords.copy(),
             attrs=self.attrs.copy(),
             variables=self.variables.copy(),
@@ -74,9 +82,17 @@ class DataFrame(Container, pd.DataFrame):
     pandas_parent = pd.DataFrame
     _metadata = ["_coords", "_attrs", "_variables"]
 
-    def copy(self):
+    def copy(self, deep=True):
+        """
+        Copy the container and its attrs, coords, and variables
+
+        With ``deep=False``, the copy shares the underlying data with this
+        container, and only the index, column, and metadata objects are
+        new.
+        """
+
         return DataFrame(
-            self.pandas_parent.copy(self),
+            self.pandas_parent.copy(self, deep=deep),
             coords=self.coords.copy(),
             attrs=self.attrs.copy(),
             variables=self.variables.copy(),
@@ -94,3 +110,160 @@ class DataFrame(Container, pd.DataFrame):
         args, kwargs, special = Container.strip_special_attributes(args, kwargs)
         pd.DataFrame.__init__(self, *args, **kwargs)
         Container.__init__(self, **special)
+
+
+class LazyContainer(object):
+    """
+    metacsv container whose data is read on first access
+
+    Returned by ``metacsv.read_csv(..., lazy=True)``. The header is parsed
+    up front, so ``attrs``, ``coords``, and ``variables`` are available
+    immediately. The data is read the first time any other attribute is
+    accessed, the container is indexed, used in an arithmetic or comparison
+    operation, or converted (e.g. with ``np.asarray``, ``to_xarray``, or
+    ``values``). Changes made to the properties before the data is read are
+    carried over to the loaded container.
+
+    pandas does not recognize the proxy, in constructors or as the right
+    operand of a pandas object's operator: use ``lazy.load()`` or
+    ``metacsv.to_pandas(lazy)``, e.g. ``pd.DataFrame(lazy.load())`` rather
+    than ``pd.DataFrame(lazy)``.
+
+    Parameters
+    ----------
+
+    loader : callable
+
+        Called with ``(attrs, coords, variables)`` to read the data and
+        return a :py:class:`~metacsv.DataFrame` or :py:class:`~metacsv.Series`
+
+    attrs, coords, variables :
+
+        Parsed properties of the container
+    """
+
+    def __init__(self, loader, attrs=None, coords=None, variables=None):
+        self._loader = loader
+        self._container = None
+        self._attrs = attrs if attrs is not None else Attributes()
+        self._coords = coords if coords is not None else Coordinates()
+        self._variables = variables if variables is not None else Variables()
+
+    @property
+    def loaded(self):
+        """True once the data has been read"""
+        return self._container is not None
+
+    def load(self):
+        """Read the data if needed and return the loaded container"""
+        if self._container is None:
+            self._container = self._loader(self._attrs, self._coords, self._variables)
+            self._loader = None
+
+        return self._container
+
+    @property
+    def attrs(self):
+        return self._container.attrs if self.loaded else self._attrs
+
+    @attrs.setter
+    def attrs(self, value):
+        if self.loaded:
+            self._container.attrs = value
+        else:
+            self._attrs = Attributes(value)
+
+    @property
+    def coords(self):
+        return self._container.coords if self.loaded else self._coords
+
+    @coords.setter
+    def coords(self, value):
+        if self.loaded:
+            self._container.coords = value
+        else:
+            self._coords = Coordinates(value)
+
+    @property
+    def variables(self):
+        return self._container.variables if self.loaded else self._variables
+
+    @variables.setter
+    def variables(self, value):
+        if self.loaded:
+            self._container.variables = value
+        else:
+            self._variables = Variables(value)
+
+    def __getattr__(self, key):
+        # private and special names are not forwarded, so that copy, pickle,
+        # and attribute lookups during __init__ do not trigger a read
+        if key.startswith("_"):
+            raise AttributeError(
+                "'{}' object has no attribute '{}'".format(type(self).__name__, key)
+            )
+
+        return getattr(self.load(), key)
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __setitem__(self, key, value):
+        self.load()[key] = value
+
+    def __len__(self):
+        return len(self.load())
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.load().values, dtype=dtype)
+
+    def __repr__(self):
+        if self.loaded:
+            return repr(self._container)
+
+        postscript = "\n".join(
+            [str(p) for p in [self._coords, self._variables, self._attrs] if p != None]
+        )
+
+        return "<{} (not loaded)>".format(
+            type(self).__module__ + "." + type(self).__name__
+        ) + ("\n" + postscript if len(postscript) > 0 else "")
+
+
+def _forward_operator(name):
+    def operator(self, other):
+        if isinstance(other, LazyContainer):
+            other = other.load()
+        return getattr(self.load(), name)(other)
+
+    operator.__name__ = name
+    return operator
+
+
+# operators are looked up on the type, so they are not reached through
+# __getattr__ and have to be forwarded explicitly
+for _name in [
+    "add",
+    "sub",
+    "mul",
+    "truediv",
+    "floordiv",
+    "mod",
+    "pow",
+    "and",
+    "or",
+    "xor",
+]:
+    for _op in ["__{}__", "__r{}__"]:
+        _op = _op.format(_name)
+        setattr(LazyContainer, _op, _forward_operator(_op))
+
+for _name in ["eq", "ne", "lt", "le", "gt", "ge"]:
+    _op = "__{}__".format(_name)
+    setattr(LazyContainer, _op, _forward_operator(_op))
+
+# defining __eq__ makes the proxy unhashable, like the containers it wraps
+LazyContainer.__hash__ = None
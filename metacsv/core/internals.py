@@ -779,12 +779,36 @@ class Container(object):
 
         fp : str
 
-            Path to which to write the metacsv-formatted CSV
+            Path to which to write the metacsv-formatted CSV. Paths ending in
+            ``.gz``, ``.bz2``, ``.xz``, or ``.zst`` are compressed, header
+            included, unless ``compression`` is given.
 
         header_file : str_or_buffer
 
             A separate metacsv-formatted header file
 
+        row_index : bool or int
+
+            Write a sidecar row index next to fp, recording the position of
+            every ``row_index``-th row (every 10000th if True) and the range
+            of each coordinate in every block, so ``read_csv(fp, rows=...)``
+            can seek to the requested rows and ``read_csv(fp, where=...)``
+            can skip blocks (see :py:func:`metacsv.build_index`)
+
+        header_padding : int
+
+            Number of bytes to reserve in the yaml header, as a comment, so
+            that :py:func:`metacsv.update_header` can later grow the header
+            without rewriting the data
+
+        workers : int
+
+            Number of processes in which to format the data. Rows are split
+            into blocks which are formatted in parallel and written in
+            order, so the file is identical to one written with a single
+            process. Only used when no positional arguments are passed to
+            pandas.
+
         *args :
 
             passed to pandas.to_csv
@@ -842,7 +866,11 @@ class Container(object):
         """
 
         to_csv.metacsv_to_header(
-            fp, attrs=self.attrs, coords=self.coords, variables=self.variables
+            fp,
+            attrs=self.attrs,
+            coords=self.coords,
+            variables=self.variables,
+            container=self,
         )
 
     def to_pandas(self):
@@ -1091,3 +1119,117 @@ class Container(object):
         """
 
         self.to_dataset().to_netcdf(fp)
+
+    def to_arrow(self):
+        """
+        Convert to a :py:class:`pyarrow.Table`
+
+        Coordinates are stored as columns, and attrs, coords, and variables
+        are stored in the table's schema (see :py:mod:`metacsv.io.arrow`).
+        Requires pyarrow.
+
+        Example
+        -------
+
+        .. code-block:: python
+
+            >>> import metacsv
+            >>> df = metacsv.DataFrame(
+            ...     {'x': [1, 2]}, attrs={'author': 'my name'}) # doctest: +SKIP
+            >>> metacsv.from_arrow(df.to_arrow()).attrs # doctest: +SKIP
+            Attributes
+                author:         my name
+
+        """
+
+        from ..io import arrow
+
+        return arrow.to_arrow(self)
+
+    def to_parquet(self, fp, **kwargs):
+        """
+        Write to a Parquet file, keeping attrs, coords, and variables
+
+        Parameters
+        ----------
+
+        fp : str or buffer
+
+            Path or file object to which to write the Parquet file
+
+        **kwargs :
+
+            passed to pyarrow.parquet.write_table (e.g. ``row_group_size``)
+
+        Example
+        -------
+
+        .. code-block:: python
+
+            >>> import metacsv
+            >>> df = metacsv.read_csv('tests/test_data/test6.csv')
+            >>> df.to_parquet('test6.parquet') # doctest: +SKIP
+            >>> metacsv.read_parquet('test6.parquet').attrs # doctest: +SKIP
+            Attributes
+                source:         Sample data for MetaCSV test
+
+        """
+
+        from ..io import parquet
+
+        parquet.to_parquet(self, fp, **kwargs)
+
+    def to_pickle(self, fp, protocol=None, compression="infer", storage_options=None):
+        """
+        Pickle to a file, keeping attrs, coords, and variables
+
+        With pickle protocol 5 (the default on Python 3.8+), numeric data is
+        written as out-of-band buffers rather than copied into the pickle
+        stream. Read the file with :py:func:`metacsv.read_pickle`;
+        pandas.read_pickle cannot read it.
+
+        Parameters
+        ----------
+
+        fp : str or buffer
+
+            Path or binary file object to which to write
+
+        protocol : int
+
+            Pickle protocol (default 5 where supported)
+
+        compression : str or None
+
+            Compression, as in pandas.to_pickle (default ``'infer'``, from the
+            extension of fp). Compressed files are ordinary pickles.
+
+        storage_options : dict
+
+            Passed to pandas.to_pickle, which writes an ordinary pickle
+
+        Example
+        -------
+
+        .. code-block:: python
+
+            >>> import metacsv
+            >>> df = metacsv.read_csv('tests/test_data/test6.csv')
+            >>> df.to_pickle('test6.pkl')
+            >>> metacsv.read_pickle('test6.pkl').coords == df.coords
+            True
+
+            >>> import os
+            >>> os.remove('test6.pkl')
+
+        """
+
+        from ..io import pickle_tools
+
+        pickle_tools.to_pickle(
+            self,
+            fp,
+            protocol=protocol,
+            compression=compression,
+            storage_options=storage_options,
+        )
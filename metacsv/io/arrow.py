@@ -0,0 +1,257 @@
+"""
+Utilities for converting metacsv files and containers to pyarrow Tables
+
+The metacsv header is kept in the Table's schema: attrs and coords are
+stored as yaml documents under the ``metacsv.attrs`` and ``metacsv.coords``
+schema metadata keys, and each variable's metadata is stored under the
+``metacsv.variable`` key of the matching field. Variables with no matching
+column are kept under the ``metacsv.variables`` schema metadata key.
+
+pyarrow is an optional dependency (``pip install metacsv[arrow]``).
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    with_statement,
+    unicode_literals,
+)
+
+import io
+from collections import OrderedDict
+from .yaml_tools import ordered_dump, ordered_load
+from .._compat import string_types
+from .parsers import (
+    _open_data,
+    _read_path_header,
+    _parse_headered_data,
+    _load_header_file,
+    _get_special_attributes,
+    _special_to_properties,
+    _verify_assertions,
+    _to_container,
+)
+
+pa = None
+
+ATTRS_KEY = b"metacsv.attrs"
+COORDS_KEY = b"metacsv.coords"
+VARIABLES_KEY = b"metacsv.variables"
+VARIABLE_KEY = b"metacsv.variable"
+
+
+def _import_pyarrow():
+    global pa
+    if pa is None:
+        try:
+            import pyarrow as pa
+            import pyarrow.csv
+        except ImportError:
+            raise ImportError(
+                "Arrow conversions require the pyarrow package "
+                "(pip install metacsv[arrow])"
+            )
+
+
+def _dump(data):
+    return ordered_dump(data, default_flow_style=False, allow_unicode=True).encode(
+        "utf-8"
+    )
+
+
+def _load(data):
+    return ordered_load(data.decode("utf-8"))
+
+
+def _attach_metadata(table, attrs, coords, variables):
+    """
+    Return table with attrs, coords, and variables stored in its schema
+    """
+
+    metadata = OrderedDict(table.schema.metadata or {})
+
+    if attrs is not None and len(attrs) > 0:
+        metadata[ATTRS_KEY] = _dump(attrs.data)
+
+    if coords is not None and len(coords) > 0:
+        metadata[COORDS_KEY] = _dump(coords._coords)
+
+    var_data = variables.data if variables is not None and variables.data else {}
+
+    fields = []
+    for field in table.schema:
+        var = var_data.get(field.name)
+        if var is not None:
+            field_metadata = OrderedDict(field.metadata or {})
+            field_metadata[VARIABLE_KEY] = _dump(var)
+            field = field.with_metadata(field_metadata)
+        fields.append(field)
+
+    unmatched = OrderedDict(
+        (k, v) for k, v in var_data.items() if k not in table.schema.names
+    )
+    if len(unmatched) > 0:
+        metadata[VARIABLES_KEY] = _dump(unmatched)
+
+    return pa.Table.from_arrays(
+        table.columns, schema=pa.schema(fields, metadata=metadata)
+    )
+
+
+def _read_metadata(schema):
+    """
+    Return the attrs, coords, and variables stored in an arrow schema
+    """
+
+    metadata = schema.metadata or {}
+    special = OrderedDict()
+
+    if ATTRS_KEY in metadata:
+        special["attrs"] = _load(metadata[ATTRS_KEY])
+
+    if COORDS_KEY in metadata:
+        special["coords"] = _load(metadata[COORDS_KEY])
+
+    variables = OrderedDict()
+    if VARIABLES_KEY in metadata:
+        variables.update(_load(metadata[VARIABLES_KEY]))
+
+    for field in schema:
+        if field.metadata and VARIABLE_KEY in field.metadata:
+            variables[field.name] = _load(field.metadata[VARIABLE_KEY])
+
+    if len(variables) > 0:
+        special["variables"] = variables
+
+    return _special_to_properties(special)
+
+
+def read_arrow(fp, header_file=None, parse_vars=False, assertions=None, **kwargs):
+    """
+    Read a csv or metacsv-formatted csv into a :py:class:`pyarrow.Table`
+
+    The data section is parsed by :py:func:`pyarrow.csv.read_csv`, without
+    going through pandas. The header is stored in the schema of the returned
+    table (see :py:mod:`metacsv.io.arrow`).
+
+    Args:
+        fp (str or buffer): csv or metacsv-formatted filepath or buffer to read
+
+    Kwargs:
+        header_file (str or buffer): optional supplemental yaml header file
+        parse_vars (bool): parse compact-style variable definitions
+        assertions (dict-like): dictionary of values to assert in file header.
+            Assertions are checked before any data is read.
+        attrs, coords, variables: header values to add to or override those
+            read from the file
+        compression (str): compression of fp, if fp is a file path (see
+            :py:func:`metacsv.read_csv`)
+
+    **kwargs passed to pyarrow.csv.read_csv (``read_options``,
+    ``parse_options``, ``convert_options``, ``memory_pool``)
+
+    Returns:
+        table (pyarrow.Table)
+
+    Example:
+
+        .. code-block:: python
+
+            >>> import metacsv
+            >>> table = metacsv.read_arrow(
+            ...     'tests/test_data/test6.csv') # doctest: +SKIP
+            >>> metacsv.from_arrow(table).attrs['source'] # doctest: +SKIP
+            'Sample data for MetaCSV test'
+
+    """
+
+    _import_pyarrow()
+
+    kwargs = dict(kwargs)
+    compression = kwargs.pop("compression", "infer")
+
+    header = _load_header_file(header_file)
+
+    def _read_header(_header):
+        header.update(_header)
+        special = _get_special_attributes(header, kwargs, parse_vars=parse_vars)
+        attrs, coords, variables = _special_to_properties(special)
+        _verify_assertions(
+            assertions, attrs=attrs, coords=coords, variables=variables
+        )
+        return attrs, coords, variables
+
+    if isinstance(fp, string_types):
+        with _open_data(fp, compression=compression) as f:
+            _header, _ = _read_path_header(fp, f=f)
+            attrs, coords, variables = _read_header(_header)
+            table = pa.csv.read_csv(f, **kwargs)
+
+    else:
+        attrs, coords, variables = _read_header(_parse_headered_data(fp))
+
+        if isinstance(fp.read(0), bytes):
+            table = pa.csv.read_csv(fp, **kwargs)
+        else:
+            table = pa.csv.read_csv(io.BytesIO(fp.read().encode("utf-8")), **kwargs)
+
+    return _attach_metadata(table, attrs, coords, variables)
+
+
+def to_arrow(container):
+    """
+    Convert a metacsv container into a :py:class:`pyarrow.Table`
+
+    Coordinates are stored as columns, and the container's attrs, coords,
+    and variables are stored in the table's schema.
+    """
+
+    _import_pyarrow()
+
+    from .converters import _coerce_to_metacsv
+
+    container = _coerce_to_metacsv(container)
+    data = container.to_pandas()
+
+    if not hasattr(data, "columns"):
+        data = data.to_frame()
+
+    if all(name is not None for name in data.index.names):
+        table = pa.Table.from_pandas(data.reset_index(), preserve_index=False)
+    else:
+        table = pa.Table.from_pandas(data)
+
+    return _attach_metadata(
+        table, container.attrs, container.coords, container.variables
+    )
+
+
+def from_arrow(table, squeeze=False, **kwargs):
+    """
+    Convert a :py:class:`pyarrow.Table` into a metacsv.DataFrame
+
+    attrs, coords, and variables are read from the table's schema. Columns
+    are converted with :py:meth:`pyarrow.Table.to_pandas` using
+    ``split_blocks=True``, so numeric columns without missing values are
+    wrapped rather than copied.
+
+    Args:
+        table (pyarrow.Table): table created by :py:func:`read_arrow` or
+            :py:func:`to_arrow`
+
+    Kwargs:
+        squeeze (bool): return a metacsv.Series if the table has a single
+            data column
+
+    **kwargs passed to pyarrow.Table.to_pandas
+    """
+
+    _import_pyarrow()
+
+    attrs, coords, variables = _read_metadata(table.schema)
+
+    kwargs.setdefault("split_blocks", True)
+    data = table.to_pandas(**kwargs)
+
+    return _to_container(data, attrs, coords, variables, squeeze=squeeze)
@@ -0,0 +1,192 @@
+"""
+Transparent access to compressed metacsv files
+
+Files are decompressed as a stream, so reading the header of a compressed
+file only inflates the first blocks of the file.
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    with_statement,
+    unicode_literals,
+)
+
+import io
+import os
+
+from .._compat import string_types
+
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+}
+
+
+def infer_compression(fp, compression="infer"):
+    """
+    Return the compression of the file at path fp
+
+    Parameters
+    ----------
+
+    fp : str
+
+        File path
+
+    compression : str or None
+
+        One of ``'gzip'``, ``'bz2'``, ``'xz'``, ``'zstd'``, or None. If
+        ``'infer'`` (default), the compression is inferred from the file
+        extension.
+
+    """
+
+    if compression != "infer":
+        if compression is not None and compression not in COMPRESSION_EXTENSIONS.values():
+            raise ValueError("Unrecognized compression '{}'".format(compression))
+        return compression
+
+    if not isinstance(fp, string_types):
+        return None
+
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(fp)[1].lower())
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "Reading and writing zstd-compressed files requires the zstandard "
+            "package"
+        )
+
+    return zstandard
+
+
+class _ZstdFile(io.RawIOBase):
+    """
+    Read-only zstd-decompressing file object
+
+    zstandard's stream reader can only seek forward, so seeking backward
+    reopens the file and decompresses up to the requested position, as
+    :py:class:`gzip.GzipFile` does.
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+        self._zstd = _import_zstandard()
+        self._raw = None
+        self._reader = None
+        self._open()
+
+    def _open(self):
+        self._close_handles()
+        self._raw = open(self._fp, "rb")
+        # files appended to hold several frames
+        self._reader = self._zstd.ZstdDecompressor().stream_reader(
+            self._raw, read_across_frames=True
+        )
+
+    def _close_handles(self):
+        if self._reader is not None:
+            self._reader.close()
+        if self._raw is not None:
+            self._raw.close()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return self._reader.readall()
+        return self._reader.read(size)
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[: len(data)] = data
+        return len(data)
+
+    def tell(self):
+        return self._reader.tell()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.tell()
+        elif whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("zstd files can only seek from the start")
+
+        if offset < self.tell():
+            self._open()
+
+        self._reader.seek(offset)
+        return self.tell()
+
+    def close(self):
+        if not self.closed:
+            self._close_handles()
+        super(_ZstdFile, self).close()
+
+
+def open_compressed(fp, mode="rb", compression="infer", encoding="utf-8"):
+    """
+    Open a file path, decompressing or compressing it as a stream
+
+    Parameters
+    ----------
+
+    fp : str
+
+        File path
+
+    mode : str
+
+        ``'rb'`` to read bytes, ``'w'`` to write text (default ``'rb'``)
+
+    compression : str or None
+
+        Compression of the file (see :py:func:`infer_compression`)
+
+    encoding : str
+
+        Text encoding used when writing (default ``'utf-8'``)
+
+    """
+
+    compression = infer_compression(fp, compression)
+    binary = "b" in mode
+
+    if compression is None:
+        return open(fp, mode) if binary else open(fp, mode, encoding=encoding)
+
+    text_mode = mode.replace("+", "").rstrip("t")
+    text_mode = text_mode if binary else text_mode + "t"
+    kwargs = {} if binary else {"encoding": encoding}
+
+    if compression == "gzip":
+        import gzip
+
+        return gzip.open(fp, text_mode, **kwargs)
+
+    if compression == "bz2":
+        import bz2
+
+        return bz2.open(fp, text_mode, **kwargs)
+
+    if compression == "xz":
+        import lzma
+
+        return lzma.open(fp, text_mode, **kwargs)
+
+    if compression == "zstd":
+        if text_mode == "rb":
+            return _ZstdFile(fp)
+
+        return _import_zstandard().open(fp, text_mode, **kwargs)
@@ -25,13 +25,16 @@ from metacsv.io.to_xarray import (
 from metacsv.io.to_csv import metacsv_to_csv, metacsv_to_header, _header_to_file_object
 
 from metacsv.io.parsers import read_csv
-from metacsv.core.containers import Series, DataFrame
+from metacsv.core.containers import Series, DataFrame, LazyContainer
 from metacsv.core.internals import Coordinates, Variables, Attributes
 from metacsv._compat import string_types, stream_types, BytesIO, StringIO
 
 
 def _coerce_to_metacsv(container, *args, **kwargs):
 
+    if isinstance(container, LazyContainer):
+        container = container.load()
+
     if not isinstance(container, (Series, DataFrame)):
         if isinstance(container, (string_types, stream_types)):
             container = read_csv(container, *args, **kwargs)
@@ -378,7 +381,7 @@ def to_pandas(container, *args, **kwargs):
         c   Z    0.954494  0.143843  0.058968  0.069010
     """
 
-    if not hasattr(container, "pandas_parent"):
+    if isinstance(container, LazyContainer) or not hasattr(container, "pandas_parent"):
         container = _coerce_to_metacsv(container, *args, **kwargs)
 
     return container.pandas_parent(container)
@@ -561,7 +564,12 @@ def to_csv(
 
     """
 
-    container = _coerce_to_metacsv(container, header_file=header_file).copy()
+    # attrs, coords, and variables are applied to a shallow copy, so the
+    # caller's container is unchanged but its data is written without being
+    # copied
+    container = _coerce_to_metacsv(container, header_file=header_file).copy(
+        deep=False
+    )
     _parse_args(container, attrs, coords, variables)
     metacsv_to_csv(container, fp, *args, **kwargs)
 
@@ -641,4 +649,6 @@ def to_header(
         if not isinstance(variables, Variables):
             variables = Variables(variables)
 
-    metacsv_to_header(fp, attrs=attrs, coords=coords, variables=variables)
+    metacsv_to_header(
+        fp, attrs=attrs, coords=coords, variables=variables, container=container
+    )
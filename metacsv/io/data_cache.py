@@ -0,0 +1,161 @@
+"""
+Binary cache of parsed metacsv files
+
+``read_csv(fp, cache=True)`` stores the container it parses in an Arrow IPC
+file next to the csv (``data.csv`` is cached in ``data.csv.mccache``).
+Later reads of the same unchanged file with the same options load the
+cache, memory-mapped, instead of parsing the csv again. The csv remains the
+source of truth: a cache is only used if the csv's size, modification time,
+and header, and the read options, all match those it was built from.
+
+Requires pyarrow (``pip install metacsv[arrow]``).
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    with_statement,
+    unicode_literals,
+)
+
+import os
+import json
+import hashlib
+import warnings
+from collections import OrderedDict
+from .yaml_tools import ordered_dump
+
+CACHE_EXTENSION = ".mccache"
+CACHE_KEY = b"metacsv.cache"
+
+
+def cache_path(fp, cache=True):
+    """
+    Return the path of the cache of the file at path fp
+
+    cache may be True, to use ``fp + '.mccache'``, or a path
+    """
+
+    if cache is True:
+        return fp + CACHE_EXTENSION
+
+    return cache
+
+
+def _hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(fp, header, options):
+    """
+    Return the key identifying a parse of the file at path fp
+
+    Parameters
+    ----------
+
+    fp : str
+
+        Path of the csv
+
+    header : dict
+
+        Header parsed from fp
+
+    options : object
+
+        Read options which affect the parsed data. Options are compared by
+        their ``repr``.
+
+    """
+
+    stat = os.stat(fp)
+
+    return OrderedDict(
+        [
+            ("size", stat.st_size),
+            ("mtime", getattr(stat, "st_mtime_ns", stat.st_mtime)),
+            ("header", _hash(ordered_dump(header, default_flow_style=False))),
+            ("options", _hash(repr(options))),
+        ]
+    )
+
+
+def load_cache(path, key):
+    """
+    Return the pyarrow.Table stored at path if it was written with key,
+    otherwise None
+
+    The file is memory-mapped, so the table's buffers are read from the page
+    cache rather than copied.
+    """
+
+    from .arrow import _import_pyarrow
+
+    _import_pyarrow()
+
+    from .arrow import pa
+
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        source = pa.memory_map(path, "r")
+        table = pa.ipc.open_file(source).read_all()
+    except (IOError, OSError, pa.ArrowInvalid):
+        return None
+
+    metadata = table.schema.metadata or {}
+    stored = metadata.get(CACHE_KEY)
+
+    if stored is None or json.loads(stored.decode("utf-8")) != dict(key):
+        return None
+
+    return table
+
+
+def write_cache(path, key, container):
+    """
+    Store a metacsv container at path as an Arrow IPC file tagged with key
+
+    The file is written to a temporary path first and then moved into place,
+    so concurrent readers never see a partial cache. The cache is only an
+    optimization: if the container cannot be converted to Arrow or the file
+    cannot be written, a warning is issued and no cache is stored.
+    """
+
+    from .arrow import _import_pyarrow, _attach_metadata
+
+    _import_pyarrow()
+
+    from .arrow import pa
+
+    data = container.to_pandas()
+    if not hasattr(data, "columns"):
+        data = data.to_frame()
+
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        table = _attach_metadata(
+            pa.Table.from_pandas(data, preserve_index=True),
+            container.attrs,
+            container.coords,
+            container.variables,
+        )
+
+        metadata = OrderedDict(table.schema.metadata or {})
+        metadata[CACHE_KEY] = json.dumps(key).encode("utf-8")
+        table = table.replace_schema_metadata(metadata)
+
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        getattr(os, "replace", os.rename)(tmp, path)
+
+    except (pa.ArrowException, OSError) as e:
+        warnings.warn("Could not write cache '{}': {}".format(path, e))
+
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -0,0 +1,133 @@
+"""
+In-process cache of parsed metacsv headers
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    with_statement,
+    unicode_literals,
+)
+
+import os
+import copy
+import threading
+from collections import OrderedDict
+
+
+class HeaderCache(object):
+    """
+    Least-recently-used cache of parsed metacsv headers
+
+    Entries are keyed on a file's absolute path, size, and modification
+    time, so a file that changes on disk is re-parsed on its next read.
+    Pass an instance (or ``True`` to use :py:data:`default_cache`) as the
+    ``header_cache`` argument of :py:func:`metacsv.read_header` or
+    :py:func:`metacsv.read_csv`.
+
+    Parameters
+    ----------
+
+    maxsize : int
+
+        Maximum number of headers to keep (default 128)
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        >>> import metacsv
+        >>> cache = metacsv.HeaderCache(maxsize=16)
+        >>> cache.hits, cache.misses
+        (0, 0)
+
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(fp):
+        """Return the cache key of the file at path fp"""
+        stat = os.stat(fp)
+        mtime = getattr(stat, "st_mtime_ns", stat.st_mtime)
+        return (os.path.abspath(fp), stat.st_size, mtime)
+
+    def get(self, key):
+        """
+        Return a copy of the (header, data offset) pair stored under key, or
+        None if the key is not cached
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # re-insert to mark as most recently used
+            self._entries[key] = entry
+            self.hits += 1
+
+        header, offset = entry
+        return copy.deepcopy(header), offset
+
+    def put(self, key, header, offset):
+        """Store a parsed header and the offset of the data section"""
+        header = copy.deepcopy(header)
+
+        with self._lock:
+            # a file only keeps its latest version in the cache
+            stale = self._keys.pop(key[0], None)
+            if stale is not None:
+                self._entries.pop(stale, None)
+
+            self._entries[key] = (header, offset)
+            self._keys[key[0]] = key
+
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                self._keys.pop(evicted[0], None)
+
+    def discard(self, fp):
+        """Remove the entry of the file at path fp, if it is cached"""
+        with self._lock:
+            key = self._keys.pop(os.path.abspath(fp), None)
+            if key is not None:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries and reset the hit and miss counters"""
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return "<{} hits={} misses={} size={} maxsize={}>".format(
+            type(self).__name__, self.hits, self.misses, len(self), self.maxsize
+        )
+
+
+default_cache = HeaderCache()
+
+
+def _get_header_cache(header_cache):
+    if header_cache is True:
+        return default_cache
+
+    if header_cache is None or header_cache is False:
+        return None
+
+    return header_cache
@@ -0,0 +1,183 @@
+"""
+Utilities for reading and writing metacsv containers as Parquet files
+
+The header is stored in the Parquet file's key-value metadata, and each
+variable's metadata is stored on the matching field, as in
+:py:mod:`metacsv.io.arrow`. Coordinates are written as columns, so the
+column statistics Parquet keeps for each row group can be used to skip row
+groups which cannot match a query on coordinates.
+
+pyarrow is an optional dependency (``pip install metacsv[arrow]``).
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    with_statement,
+    unicode_literals,
+)
+
+from .._compat import string_types
+from .arrow import _import_pyarrow, _read_metadata, to_arrow
+from .parsers import (
+    _project_columns,
+    _verify_assertions,
+    _filter_where,
+    _to_container,
+)
+from .sidecar import _normalize_where, _block_may_match
+
+pq = None
+
+
+def _import_parquet():
+    global pq
+    _import_pyarrow()
+    if pq is None:
+        import pyarrow.parquet as pq
+
+
+def to_parquet(container, fp, **kwargs):
+    """
+    Write a metacsv container to a Parquet file
+
+    Parameters
+    ----------
+
+    container : object
+
+        A metacsv or pandas Series or DataFrame
+
+    fp : str or buffer
+
+        Path or file object to which to write the Parquet file
+
+    **kwargs :
+
+        passed to pyarrow.parquet.write_table (e.g. ``row_group_size`` or
+        ``compression``). Sorting by a coordinate and writing several row
+        groups lets :py:func:`read_parquet` skip row groups when filtering
+        on that coordinate.
+
+    """
+
+    _import_parquet()
+
+    pq.write_table(to_arrow(container), fp, **kwargs)
+
+
+def _row_group_stats(metadata, row_group, name):
+    """
+    Return the (min, max) statistics of column name in a row group, or
+    (None, None) if they are not available
+    """
+
+    group = metadata.row_group(row_group)
+
+    for i in range(group.num_columns):
+        column = group.column(i)
+        if column.path_in_schema != name:
+            continue
+
+        stats = column.statistics
+        if stats is None or not stats.has_min_max:
+            break
+
+        return stats.min, stats.max
+
+    return None, None
+
+
+def _match_row_groups(parquet_file, where):
+    """
+    Return the row groups of a Parquet file whose statistics do not rule out
+    rows matching where
+    """
+
+    metadata = parquet_file.metadata
+    where = _normalize_where(where)
+    groups = []
+
+    for row_group in range(metadata.num_row_groups):
+        if all(
+            _block_may_match(cond, *_row_group_stats(metadata, row_group, col))
+            for col, cond in where.items()
+        ):
+            groups.append(row_group)
+
+    return groups
+
+
+def read_parquet(fp, variables=None, where=None, assertions=None, squeeze=False):
+    """
+    Read a Parquet file written by :py:func:`to_parquet` into a
+    metacsv.DataFrame
+
+    Args:
+        fp (str or buffer): Parquet filepath or buffer to read
+
+    Kwargs:
+        variables (list): names of the variables to read. Only these columns
+            and the coordinates they depend on are read.
+        where (dict): read only rows matching these conditions on columns or
+            coordinates (see :py:func:`metacsv.read_csv`). Row groups whose
+            statistics rule out any match are not read.
+        assertions (dict-like): dictionary of values to assert in the header.
+            Assertions are checked before any data is read.
+        squeeze (bool): return a metacsv.Series if a single data column is
+            read
+
+    Returns:
+        container (metacsv.DataFrame or metacsv.Series)
+
+    Example:
+
+        .. code-block:: python
+
+            >>> import metacsv
+            >>> df = metacsv.read_csv('tests/test_data/test6.csv')
+            >>> df.to_parquet('test6.parquet') # doctest: +SKIP
+            >>> metacsv.read_parquet(
+            ...     'test6.parquet', variables=['col1']).columns # doctest: +SKIP
+            Index(['col1'], dtype='object')
+
+    """
+
+    _import_parquet()
+
+    parquet_file = pq.ParquetFile(fp)
+
+    attrs, coords, variables_meta = _read_metadata(parquet_file.schema_arrow)
+    _verify_assertions(
+        assertions, attrs=attrs, coords=coords, variables=variables_meta
+    )
+
+    columns = None
+    if variables is not None:
+        if isinstance(variables, string_types):
+            variables = [variables]
+
+        kwargs = {}
+        coords, variables_meta = _project_columns(
+            variables, coords, variables_meta, kwargs
+        )
+        columns = kwargs["usecols"]
+
+    if where is not None:
+        groups = _match_row_groups(parquet_file, where)
+    else:
+        groups = list(range(parquet_file.metadata.num_row_groups))
+
+    # with no matching row groups, read the first so the empty result keeps
+    # the file's dtypes
+    if len(groups) == 0 and parquet_file.metadata.num_row_groups > 0:
+        groups = [0]
+
+    table = parquet_file.read_row_groups(
+        groups, columns=columns, use_pandas_metadata=True
+    )
+
+    data = _filter_where(table.to_pandas(split_blocks=True), where)
+
+    return _to_container(data, attrs, coords, variables_meta, squeeze=squeeze)
@@ -7,51 +7,518 @@ from __future__ import (
 )
 
 import pandas as pd
-import re
+import numpy as np
+import glob
+import io
+import mmap
+import os
+import warnings
+from contextlib import contextmanager
 from collections import OrderedDict
 from .yaml_tools import ordered_load
-from .._compat import string_types, has_iteritems, iteritems
+from .header_cache import _get_header_cache
+from .compression import infer_compression, open_compressed
+from .sidecar import load_index, _header_rows, _normalize_where
+from .data_cache import cache_path, cache_key, load_cache, write_cache
+from .pickle_tools import MAGIC as PICKLE_MAGIC, read_pickle_file
+from .._compat import string_types, has_iterkeys, has_iteritems, iteritems
 from ..core.internals import Container, Attributes, Variables, Coordinates
-from ..core.containers import Series, DataFrame
+from ..core.containers import Series, DataFrame, LazyContainer
+
+
+HEADER_BLOCKSIZE = 64 * 1024
+
+
+def _is_fence(line, char):
+    line = line.strip()
+    return len(line) >= 3 and len(line.strip(char)) == 0
 
 
 def find_yaml_start(line):
-    return re.search(r"^\s*-{3,}\s*$", line) is not None
+    return _is_fence(line, b"-" if isinstance(line, (bytes, bytearray)) else "-")
 
 
 def find_yaml_stop(line):
-    return re.search(r"^\s*\.{3,}\s*$", line) is not None
+    return _is_fence(line, b"." if isinstance(line, (bytes, bytearray)) else ".")
+
+
+def _scan_header(fp, blocksize=HEADER_BLOCKSIZE):
+    """
+    Locate a yaml header at the current position of a binary file object
+
+    The file is read in fixed-size blocks only until the ``...`` terminator
+    is found, so the cost of the scan is bounded by the size of the header
+    rather than the size of the file.
+
+    Returns:
+        header (bytes or None): raw header text between the ``---`` and
+            ``...`` fences, or None if the data has no header
+        offset (int): file position at which the data section starts
+    """
+
+    start = fp.tell()
+    buf = bytearray()
+
+    def _fill():
+        block = fp.read(blocksize)
+        if not block:
+            return False
+        buf.extend(block)
+        return True
+
+    # find the first non-blank line
+    pos = 0
+    while True:
+        end = buf.find(b"\n", pos)
+        if end == -1:
+            if _fill():
+                continue
+            end = len(buf)
+
+        line = buf[pos:end]
+        if line.strip() or end >= len(buf):
+            break
+
+        pos = end + 1
+
+    if not find_yaml_start(line):
+        return None, start
+
+    header_start = end + 1
+    search = header_start
+
+    while True:
+        idx = buf.find(b"...", search)
+
+        if idx == -1:
+            # the terminator may straddle the block boundary
+            search = max(header_start, len(buf) - 2)
+            if not _fill():
+                raise ValueError("yaml header is not terminated by '...'")
+            continue
+
+        line_start = max(buf.rfind(b"\n", header_start, idx) + 1, header_start)
+        line_end = buf.find(b"\n", idx)
+
+        if line_end == -1:
+            if _fill():
+                continue
+            line_end = len(buf)
+
+        if find_yaml_stop(buf[line_start:line_end]):
+            offset = start + min(line_end + 1, len(buf))
+            return bytes(buf[header_start:line_start]), offset
+
+        search = line_end + 1
+
+
+def _scan_text_header(fp):
+    """
+    Locate a yaml header at the current position of a text file object
+
+    Returns the header text (or None) and leaves fp at the start of the data
+    """
+
+    loc = fp.tell()
+
+    line = fp.readline()
+    while line and not line.strip():
+        line = fp.readline()
+
+    if not find_yaml_start(line):
+        fp.seek(loc)
+        return None
 
+    lines = []
+    line = fp.readline()
+    while not find_yaml_stop(line):
+        if not line:
+            raise ValueError("yaml header is not terminated by '...'")
+        lines.append(line)
+        line = fp.readline()
 
-def _parse_headered_data(fp):
+    return "".join(lines)
+
+
+def _parse_headered_data(fp, encoding=None):
 
     # Check for a yaml parse break at the top of the file
     # if there is not one, go back to the top and read like a
     # normal CSV
-    loc = fp.tell()
 
-    nextline = ""
+    if isinstance(fp.read(0), bytes):
+        header, offset = _scan_header(fp)
+        fp.seek(offset)
 
-    while re.search(r"^[\s\n\r]*$", nextline):
-        nextline = next(fp)
+        if header is None:
+            return OrderedDict()
 
-    if not find_yaml_start(nextline):
-        fp.seek(loc)
-        return OrderedDict()
+        yaml_text = header.decode(encoding or "utf-8")
+
+    else:
+        yaml_text = _scan_text_header(fp)
 
-    yaml_text = ""
-    this_line = ""
+        if yaml_text is None:
+            return OrderedDict()
 
-    while not find_yaml_stop(this_line):
-        yaml_text += "\n" + this_line.rstrip("\n")
-        this_line = next(fp)
     yaml_text = yaml_text.replace("\t", " ")
 
     header = ordered_load(yaml_text)
 
+    if header is None:
+        return OrderedDict()
+
     return header
 
 
+def _read_path_header(fp, f=None, cache=None, encoding=None, compression="infer"):
+    """
+    Parse the header of the file at path fp, using cache if provided
+
+    If an open binary file object f for fp is given, it is left positioned at
+    the start of the data section. Otherwise the file is only opened on a
+    cache miss. Offsets of compressed files are positions in the
+    decompressed stream.
+
+    Returns the parsed header and the offset of the data section
+    """
+
+    if cache is not None:
+        key = cache.key(fp)
+        entry = cache.get(key)
+
+        if entry is not None:
+            if f is not None:
+                f.seek(entry[1])
+            return entry
+
+    if f is None:
+        with _open_data(fp, compression=compression) as f:
+            header = _parse_headered_data(f, encoding=encoding)
+            offset = f.tell()
+    else:
+        header = _parse_headered_data(f, encoding=encoding)
+        offset = f.tell()
+
+    if cache is not None:
+        cache.put(key, header, offset)
+
+    return header, offset
+
+
+class _MappedFile(io.RawIOBase):
+    """
+    Read-only raw file object over a memory-mapped file
+
+    pandas does not recognize :py:class:`mmap.mmap` objects as buffers, so
+    this wrapper reads directly from the mapping. Wrap it in an
+    :py:class:`io.BufferedReader` so pandas can decode it as text for the
+    python engine or hand it to pyarrow.
+    """
+
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+    def readinto(self, b):
+        data = self._mapping.read(len(b))
+        b[: len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self._mapping.seek(offset, whence)
+        return self._mapping.tell()
+
+    def tell(self):
+        return self._mapping.tell()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        if not self.closed:
+            self._mapping.close()
+        super(_MappedFile, self).close()
+
+
+@contextmanager
+def _open_data(fp, memory_map=False, compression="infer"):
+    """
+    Open a metacsv-formatted file path as a binary file object
+
+    If memory_map is True, the file is memory-mapped and the returned object
+    reads from the mapping, letting the page cache serve concurrent readers.
+
+    Compressed files are decompressed as they are read, so only the blocks
+    needed to reach a given position are inflated. Compressed files are
+    never memory-mapped.
+    """
+
+    if infer_compression(fp, compression) is not None:
+        with open_compressed(fp, "rb", compression=compression) as f:
+            yield f
+        return
+
+    with open(fp, "rb") as f:
+        if memory_map and os.fstat(f.fileno()).st_size > 0:
+            mapped = io.BufferedReader(
+                _MappedFile(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            )
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+        else:
+            yield f
+
+
+class _ConcatFile(io.RawIOBase):
+    """
+    Read-only raw file object which reads head, then the rest of f
+
+    Used to hand pandas the column header of a file followed by the data
+    from an arbitrary later position. Wrap it in an
+    :py:class:`io.BufferedReader` to give the parsing engines the full file
+    API.
+    """
+
+    def __init__(self, head, f):
+        self._head = head
+        self._pos = 0
+        self._f = f
+
+    def readinto(self, b):
+        size = len(b)
+
+        data = self._head[self._pos : self._pos + size]
+        self._pos += len(data)
+
+        if len(data) < size:
+            data += self._f.read(size - len(data))
+
+        b[: len(data)] = data
+        return len(data)
+
+    def readable(self):
+        return True
+
+
+def _row_window(fp, rows, offset, kwargs):
+    """
+    Restrict a read to the rows in the slice rows
+
+    The slice is translated to ``skiprows`` and ``nrows`` arguments. If fp is
+    a file path with an up-to-date sidecar index (see
+    :py:mod:`metacsv.io.sidecar`), the returned window gives the position of
+    the block containing the first row, so the read can start there rather
+    than at the top of the data section.
+
+    Returns a window (block position, number of column header lines) or None
+    """
+
+    if rows.step not in (None, 1):
+        raise ValueError("rows must be a contiguous slice")
+
+    if kwargs.get("skiprows") is not None or kwargs.get("nrows") is not None:
+        raise ValueError("rows cannot be combined with skiprows or nrows")
+
+    header_rows = _header_rows(kwargs.get("header", "infer"))
+
+    index = None
+    if isinstance(fp, string_types):
+        index = load_index(fp)
+        if index is not None and (
+            index.data_offset != offset or index.header_rows != header_rows
+        ):
+            index = None
+
+    start, stop = rows.start, rows.stop
+    if (start is not None and start < 0) or (stop is not None and stop < 0):
+        if index is None:
+            raise ValueError(
+                "negative rows require a sidecar index (see metacsv.build_index)"
+            )
+        start, stop, _ = rows.indices(index.nrows)
+
+    start = start or 0
+    if stop is not None:
+        kwargs["nrows"] = max(stop - start, 0)
+
+    if index is None or len(index.offsets) == 0:
+        if start > 0:
+            kwargs["skiprows"] = range(header_rows, header_rows + start)
+        return None
+
+    block_offset, skip = index.locate(start)
+    if skip > 0:
+        kwargs["skiprows"] = range(header_rows, header_rows + skip)
+
+    return block_offset, header_rows
+
+
+def _window_stream(f, offset, window=None):
+    """
+    Position a binary file object at the start of the data section, or
+    return a stream of the column header followed by the block given by
+    window
+    """
+
+    f.seek(offset)
+
+    if window is None:
+        return f
+
+    block_offset, header_rows = window
+    head = b"".join(f.readline() for _ in range(header_rows))
+    f.seek(block_offset)
+
+    return io.BufferedReader(_ConcatFile(head, f))
+
+
+def _where_runs(fp, where, offset, kwargs):
+    """
+    Return the runs of rows which may match where, as (position, first row,
+    number of rows) triples, or None if fp has no up-to-date sidecar index
+
+    Runs are found from the per-block statistics of the sidecar index (see
+    :py:mod:`metacsv.io.sidecar`). Blocks whose range of values cannot
+    satisfy where are never read.
+    """
+
+    if kwargs.get("skiprows") is not None or kwargs.get("nrows") is not None:
+        raise ValueError("where cannot be combined with skiprows or nrows")
+
+    if not isinstance(fp, string_types):
+        return None
+
+    index = load_index(fp)
+    header_rows = _header_rows(kwargs.get("header", "infer"))
+
+    if (
+        index is None
+        or len(index.stats) == 0
+        or index.data_offset != offset
+        or index.header_rows != header_rows
+    ):
+        return None
+
+    runs = index.match_blocks(where)
+
+    # with no matching blocks, the first block is still read (and then
+    # filtered out) so the empty result has the file's dtypes
+    if len(runs) == 0 and len(index.offsets) > 0:
+        runs = [(index.offsets[0], 0, min(index.block_rows, index.nrows))]
+
+    return runs
+
+
+def _read_frame(f, offset, args, kwargs, window=None, runs=None):
+    """
+    Read the data section of a binary file object into a pandas.DataFrame
+
+    If runs is given (see :py:func:`_where_runs`), only the rows in each run
+    are parsed. Default integer indices are numbered by row in the file, as
+    they would be by a read of the whole file.
+    """
+
+    if runs is None:
+        return pd.read_csv(_window_stream(f, offset, window), *args, **kwargs)
+
+    header_rows = _header_rows(kwargs.get("header", "infer"))
+    frames = []
+
+    if len(runs) == 0:
+        return pd.read_csv(_window_stream(f, offset), *args, **dict(kwargs, nrows=0))
+
+    for position, start, nrows in runs:
+        stream = _window_stream(f, offset, (position, header_rows))
+        data = pd.read_csv(stream, *args, **dict(kwargs, nrows=nrows))
+
+        if isinstance(data.index, pd.RangeIndex):
+            data.index = data.index + start
+
+        frames.append(data)
+
+    return pd.concat(frames)
+
+
+def _filter_where(data, where):
+    """
+    Select the rows of a pandas.DataFrame matching where
+    """
+
+    if where is None:
+        return data
+
+    mask = np.ones(len(data), dtype=bool)
+
+    for col, cond in _normalize_where(where).items():
+        if col in data.columns:
+            values = np.asarray(data[col])
+        elif col in data.index.names:
+            values = np.asarray(data.index.get_level_values(col))
+        else:
+            raise KeyError("where column '{}' not found in data".format(col))
+
+        if cond[0] == "in":
+            mask &= np.isin(values, cond[1])
+        else:
+            _, low, high = cond
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+
+    return data[mask]
+
+
+def _python_engine_required(kwargs):
+    """
+    Check whether the pandas read_csv options can only be handled by the
+    pure-python parsing engine
+    """
+
+    # sep=None asks the python engine to sniff the delimiter
+    for key in ["sep", "delimiter"]:
+        if key in kwargs and kwargs[key] is None:
+            return True
+
+    sep = kwargs.get("sep", kwargs.get("delimiter"))
+
+    if sep is not None and len(sep) > 1 and sep != r"\s+":
+        return True
+
+    if kwargs.get("skipfooter", 0):
+        return True
+
+    return False
+
+
+def _set_default_engine(kwargs):
+    """
+    Choose the fastest pandas parsing engine that handles the requested options
+
+    The C engine is used unless the caller asks for an engine explicitly or
+    passes options only the python engine supports. ``engine="pyarrow"`` is
+    supported on pandas versions that provide it, but is never chosen by
+    default because its type inference differs from the other engines.
+
+    When the C engine is chosen, types are inferred from whole columns
+    (``low_memory=False``) unless the caller says otherwise, as the python
+    engine does. Otherwise a column could be parsed with different types in
+    different chunks of the file.
+    """
+
+    if kwargs.get("engine") is None:
+        if _python_engine_required(kwargs):
+            kwargs["engine"] = "python"
+        else:
+            kwargs["engine"] = "c"
+            kwargs.setdefault("low_memory", False)
+
+
 def _verify_deep_assertion(verify_par, par):
     if par is None:
         raise ValueError("Assertions failed")
@@ -94,6 +561,293 @@ def _verify_assertions(assertions=None, attrs=None, coords=None, variables=None)
         _verify_deep_assertion(arg, attrs[kw])
 
 
+def _load_header_file(header_file=None):
+    header = OrderedDict()
+
+    if isinstance(header_file, string_types):
+        with open(header_file, "r") as hf:
+            header = ordered_load(hf.read())
+
+    elif header_file is not None:
+        header = ordered_load(header_file.read())
+
+    return header
+
+
+def _get_special_attributes(header, kwargs, parse_vars=False):
+    """
+    Combine a parsed header with attrs, coords, and variables passed as
+    keyword arguments, removing them from kwargs
+    """
+
+    special_kwargs = {"attrs": header}
+    for prop in ["coords", "variables"]:
+        if prop in kwargs:
+            special_kwargs[prop] = kwargs.pop(prop)
+
+    if "attrs" in kwargs:
+        header.update(kwargs.pop("attrs"))
+
+    _, _, special = Container.strip_special_attributes((), special_kwargs)
+
+    if parse_vars:
+        if "variables" in special:
+            for key, var in special["variables"].items():
+                special["variables"][key] = Variables.parse_string_var(var)
+
+    return special
+
+
+def _special_to_properties(special):
+    attrs = Attributes(None if ("attrs" not in special) else special["attrs"])
+    coords = Coordinates(None if ("coords" not in special) else special["coords"])
+    variables = Variables(
+        None if ("variables" not in special) else special["variables"]
+    )
+
+    return attrs, coords, variables
+
+
+def _project_columns(usevars, coords, variables, kwargs):
+    """
+    Restrict the columns read to the requested variables and the coordinates
+    they depend on
+
+    Data variables depend on every base coordinate. Requested non-base
+    coordinates pull in the coordinates they are defined on. The selection
+    is passed to the parser as ``usecols``, and coords and variables are
+    pruned to the columns that will be read.
+    """
+
+    if "usecols" in kwargs:
+        raise ValueError("Select columns with either variables or usecols, not both")
+
+    graph = OrderedDict(coords.items())
+    keep = set()
+
+    def add_coord(coord):
+        if coord in keep:
+            return
+
+        keep.add(coord)
+        for dep in graph[coord] or []:
+            add_coord(dep)
+
+    for coord in coords.base_coords or []:
+        add_coord(coord)
+
+    for var in usevars:
+        if var in graph:
+            add_coord(var)
+
+    usecols = [c for c in graph if c in keep]
+    usecols += [v for v in usevars if v not in graph]
+
+    index_col = kwargs.get("index_col")
+    if isinstance(index_col, string_types):
+        index_col = [index_col]
+
+    # pandas applies positions to the selected columns, not to the file's
+    # columns, so they would silently pick the wrong ones
+    positions = index_col if isinstance(index_col, (list, tuple)) else [index_col]
+    if any(
+        isinstance(c, (int, np.integer)) and not isinstance(c, bool) for c in positions
+    ):
+        raise ValueError(
+            "index_col must name columns, not give their positions, when "
+            "variables are selected"
+        )
+
+    if isinstance(index_col, (list, tuple)):
+        usecols += [
+            c for c in index_col if isinstance(c, string_types) and c not in usecols
+        ]
+
+    kwargs["usecols"] = usecols
+
+    if len(keep) > 0:
+        coords = Coordinates(OrderedDict([(c, graph[c]) for c in graph if c in keep]))
+
+    if len(variables) > 0:
+        variables = Variables(
+            OrderedDict([(k, v) for k, v in variables.items() if k in usecols])
+        )
+
+    return coords, variables
+
+
+def _set_header_dtypes(variables, kwargs):
+    """
+    Pass dtypes declared in variable metadata to the parser
+
+    dtypes passed to read_csv take precedence over those in the header. A
+    single dtype passed for all columns disables the header dtypes.
+    """
+
+    dtypes = OrderedDict(
+        [
+            (k, v["dtype"])
+            for k, v in variables.items()
+            if has_iterkeys(v) and v.get("dtype") is not None
+        ]
+    )
+
+    if len(dtypes) == 0:
+        return
+
+    user_dtypes = kwargs.get("dtype")
+
+    if user_dtypes is None:
+        kwargs["dtype"] = dtypes
+
+    elif has_iterkeys(user_dtypes):
+        dtypes.update(user_dtypes)
+        kwargs["dtype"] = dtypes
+
+
+def _attach_properties(container, attrs, coords, variables):
+    """
+    Assign already-parsed properties to a container without copying them
+
+    The coordinate graph is shared rather than re-parsed; only the columns
+    named in coords are moved into the container's index.
+    """
+
+    container._attrs = attrs
+    container._variables = variables
+    container._coords = Coordinates(container=container)
+    container._coords.__set__(coords)
+
+    return container
+
+
+def _to_container(data, attrs, coords, variables, squeeze=False):
+    """
+    Wrap data read by pandas in a metacsv container with parsed properties
+    """
+
+    if squeeze and len(data.shape) == 1:
+        return _attach_properties(Series(data), attrs, coords, variables)
+
+    df = _attach_properties(DataFrame(data), attrs, coords, variables)
+
+    if squeeze and df.shape[1] == 1:
+        return _attach_properties(
+            Series(df[df.columns[0]]), attrs, coords, variables
+        )
+
+    return df
+
+
+def _set_categorical_coords(coords, kwargs):
+    """
+    Parse every coordinate column as a categorical
+
+    Returns the names of the coordinates parsed this way. dtypes passed to
+    read_csv or declared in the header for individual coordinates take
+    precedence.
+    """
+
+    user_dtypes = kwargs.get("dtype")
+
+    if user_dtypes is not None and not has_iterkeys(user_dtypes):
+        return []
+
+    dtypes = OrderedDict([(c, "category") for c in coords])
+    dtypes.update(user_dtypes or {})
+    kwargs["dtype"] = dtypes
+
+    return [c for c in coords if dtypes[c] == "category"]
+
+
+def _restore_category_types(data, categorical):
+    """
+    Convert numeric categories back to numbers
+
+    The parser reads categories as strings. Converting only the categories
+    gives the same values the parser would have inferred for the column.
+    """
+
+    if not categorical or not hasattr(data, "columns"):
+        return data
+
+    for col in categorical:
+        if col not in data.columns:
+            continue
+
+        categories = data[col].cat.categories
+
+        try:
+            data[col] = data[col].cat.rename_categories(pd.to_numeric(categories))
+        except (ValueError, TypeError):
+            pass
+
+    return data
+
+
+def _read_data(
+    fp,
+    args,
+    kwargs,
+    offset=None,
+    memory_map=False,
+    categorical=None,
+    compression="infer",
+    window=None,
+    runs=None,
+    where=None,
+):
+    """
+    Read the data section of a metacsv file starting at offset
+    """
+
+    if isinstance(fp, string_types):
+        with _open_data(fp, memory_map=memory_map, compression=compression) as f:
+            data = _read_frame(f, offset or 0, args, kwargs, window=window, runs=runs)
+
+    else:
+        if offset is not None:
+            fp.seek(offset)
+
+        data = pd.read_csv(fp, *args, **kwargs)
+
+    return _filter_where(_restore_category_types(data, categorical), where)
+
+
+def _read_chunks(
+    fp,
+    args,
+    kwargs,
+    attrs,
+    coords,
+    variables,
+    offset=0,
+    memory_map=False,
+    categorical=None,
+    compression="infer",
+    window=None,
+):
+    """
+    Yield metacsv.DataFrame chunks of the data section of a metacsv file
+
+    Every chunk shares the same attrs, coords, and variables objects.
+    """
+
+    if isinstance(fp, string_types):
+        with _open_data(fp, memory_map=memory_map, compression=compression) as f:
+            f = _window_stream(f, offset, window)
+            for chunk in _read_chunks(
+                f, args, kwargs, attrs, coords, variables, categorical=categorical
+            ):
+                yield chunk
+
+        return
+
+    for data in pd.read_csv(fp, *args, **kwargs):
+        data = _restore_category_types(data, categorical)
+        yield _attach_properties(DataFrame(data), attrs, coords, variables)
+
+
 def read_header(
     fp, header_file=None, parse_vars=False, assertions=None, *args, **kwargs
 ):
@@ -107,6 +861,13 @@ def read_header(
         header_file (str or buffer): optional supplemental yaml header file
         parse_vars (bool): parse compact-style variable definitions (see example)
         assertions (dict-like): dictionary of values to assert in file header
+        header_cache (bool or HeaderCache): if fp is a file path, reuse headers
+            parsed earlier from the same unchanged file. Pass True to use
+            ``metacsv.io.header_cache.default_cache``.
+        compression (str): if fp is a file path, one of ``'gzip'``, ``'bz2'``,
+            ``'xz'``, ``'zstd'``, or None. By default the compression is
+            inferred from the file extension. Only the blocks containing the
+            header are decompressed.
 
     Returns:
         args
@@ -193,37 +954,21 @@ def read_header(
 
     kwargs = dict(kwargs)
 
-    header = OrderedDict()
+    cache = _get_header_cache(kwargs.pop("header_cache", None))
+    compression = kwargs.pop("compression", "infer")
 
-    if isinstance(header_file, string_types):
-        with open(header_file, "r") as hf:
-            header = ordered_load(hf.read())
-
-    elif header_file is not None:
-        header = ordered_load(hf.read())
+    header = _load_header_file(header_file)
 
     if isinstance(fp, string_types):
-        with open(fp, "r") as fp:
-            _header = _parse_headered_data(fp)
+        _header, _ = _read_path_header(fp, cache=cache, compression=compression)
 
     else:
         _header = _parse_headered_data(fp)
 
     header.update(_header)
 
-    kwargs.update({"attrs": header})
-    args, kwargs, special = Container.strip_special_attributes(args, kwargs)
-
-    if parse_vars:
-        if "variables" in special:
-            for key, var in special["variables"].items():
-                special["variables"][key] = Variables.parse_string_var(var)
-
-    attrs = Attributes(None if ("attrs" not in special) else special["attrs"])
-    coords = Coordinates(None if ("coords" not in special) else special["coords"])
-    variables = Variables(
-        None if ("variables" not in special) else special["variables"]
-    )
+    special = _get_special_attributes(header, kwargs, parse_vars=parse_vars)
+    attrs, coords, variables = _special_to_properties(special)
 
     _verify_assertions(assertions, attrs=attrs, coords=coords, variables=variables)
 
@@ -240,7 +985,48 @@ def read_csv(fp, header_file=None, parse_vars=False, assertions=None, *args, **k
     Kwargs:
         header_file (str or buffer): optional supplemental yaml header file
         parse_vars (bool): parse compact-style variable definitions (see example)
-        assertions (dict-like): dictionary of values to assert in file header
+        assertions (dict-like): dictionary of values to assert in file header.
+            Assertions are checked before any data is read.
+        memory_map (bool): if fp is a file path, memory-map the file and parse
+            the data directly from the mapping (default False)
+        header_cache (bool or HeaderCache): if fp is a file path, reuse headers
+            parsed earlier from the same unchanged file. Pass True to use
+            ``metacsv.io.header_cache.default_cache``.
+        compression (str): if fp is a file path, one of ``'gzip'``, ``'bz2'``,
+            ``'xz'``, ``'zstd'``, or None. By default the compression is
+            inferred from the file extension (``.gz``, ``.bz2``, ``.xz``, or
+            ``.zst``). The file is decompressed as a stream.
+        cache (bool or str): if fp is a file path, store the parsed
+            container in a binary Arrow IPC file (``fp + '.mccache'`` if True,
+            or the given path). Later reads of the unchanged file with the
+            same options load the memory-mapped cache instead of parsing the
+            csv. Requires pyarrow.
+        chunksize (int): return an iterator of metacsv.DataFrame chunks of
+            ``chunksize`` rows. The header is parsed once and its attrs,
+            coords, and variables are shared by every chunk.
+        variables (list): names of the variables to read. Only these
+            columns and the coordinates they depend on are parsed. A dict
+            passed as variables instead supplies variable metadata. With a
+            list, index_col must give column names rather than positions.
+        categorical_coords (bool): parse every column listed in coords as a
+            categorical, building the index from the category codes
+            (default False)
+        rows (slice): read only the rows in this slice of the data section.
+            If fp is a file path with a sidecar index written by
+            :py:func:`metacsv.build_index` or ``to_csv(row_index=...)``, the
+            read seeks to the block containing the first row instead of
+            parsing from the top of the file. Negative bounds require an
+            index.
+        where (dict): read only rows matching these conditions on columns
+            or coordinates. A ``(low, high)`` tuple selects values in an
+            inclusive range (either bound may be None), a list selects any of
+            the listed values, and any other value selects equal values. If
+            fp is a file path with a sidecar index holding block statistics,
+            blocks which cannot contain matching rows are skipped without
+            being parsed.
+        lazy (bool): parse only the header and return a
+            :py:class:`~metacsv.LazyContainer` which reads the data the first
+            time it is accessed (default False)
 
     *args, **kwargs passed to pandas.read_csv
 
@@ -341,74 +1127,408 @@ def read_csv(fp, header_file=None, parse_vars=False, assertions=None, *args, **k
 
     kwargs = dict(kwargs)
 
+    # a binary cache is keyed on every option which changes the parsed data
+    data_cache = kwargs.pop("cache", None)
+    options = (
+        parse_vars,
+        args,
+        sorted(
+            (k, v)
+            for k, v in kwargs.items()
+            if k not in ("header_cache", "memory_map")
+        ),
+    )
+
     squeeze = kwargs.get("squeeze", False)
 
-    # set defaults
-    engine = kwargs.pop("engine", "python")
-    kwargs["engine"] = engine
+    # with chunksize or iterator, return chunks rather than one container
+    iterate = (kwargs.get("chunksize") is not None) or kwargs.get("iterator", False)
 
-    header = OrderedDict()
+    lazy = kwargs.pop("lazy", False)
+    categorical_coords = kwargs.pop("categorical_coords", False)
+    categorical = []
+    if lazy and iterate:
+        raise ValueError("lazy reads cannot be combined with chunksize or iterator")
 
-    if isinstance(header_file, string_types):
-        with open(header_file, "r") as hf:
-            header = ordered_load(hf.read())
+    if data_cache and (lazy or iterate):
+        raise ValueError("cache cannot be combined with lazy, chunksize or iterator")
 
-    elif header_file is not None:
-        header = ordered_load(hf.read())
+    if data_cache and not isinstance(fp, string_types):
+        raise ValueError("cache requires fp to be a file path")
 
-    if isinstance(fp, string_types):
-        with open(fp, "r") as fp:
-            _header = _parse_headered_data(fp)
-            data = pd.read_csv(fp, *args, **kwargs)
+    # memory-mapping is handled here rather than by pandas so the mapping
+    # can start after the header
+    memory_map = kwargs.pop("memory_map", False)
 
-    else:
-        _header = _parse_headered_data(fp)
-        data = pd.read_csv(fp, *args, **kwargs)
+    # decompression is likewise handled here, and pandas reads the
+    # decompressed stream
+    compression = kwargs.pop("compression", "infer")
 
-    header.update(_header)
+    cache = _get_header_cache(kwargs.pop("header_cache", None))
 
-    kwargs.update({"attrs": header})
-    args, kwargs, special = Container.strip_special_attributes(args, kwargs)
+    rows = kwargs.pop("rows", None)
+    window = None
 
-    if parse_vars:
-        if "variables" in special:
-            for key, var in special["variables"].items():
-                special["variables"][key] = Variables.parse_string_var(var)
+    where = kwargs.pop("where", None)
+    runs = None
+    if where is not None and (rows is not None or iterate):
+        raise ValueError("where cannot be combined with rows, chunksize or iterator")
 
-    if squeeze:
-        if len(data.shape) == 1:
-            s = Series(data, **special)
-            _verify_assertions(
-                assertions, attrs=s.attrs, variables=s.variables, coords=s.coords
-            )
-            return s
+    # a list of names passed as variables selects the columns to read,
+    # while a dict-like provides variable metadata
+    usevars = None
+    if kwargs.get("variables") is not None and not has_iterkeys(kwargs["variables"]):
+        usevars = kwargs.pop("variables")
+        if isinstance(usevars, string_types):
+            usevars = [usevars]
 
-    df = DataFrame(data, **special)
+    header = _load_header_file(header_file)
+    special_kwargs = {}
+    for prop in ["attrs", "coords", "variables"]:
+        if prop in kwargs:
+            special_kwargs[prop] = kwargs.pop(prop)
 
-    if squeeze and df.shape[1] == 1:
-        s = Series(df[df.columns[0]], **special)
+    # set defaults
+    _set_default_engine(kwargs)
+
+    # assertions are checked as soon as the header is parsed so that files
+    # which fail them are rejected without reading the data
+    def _check_header(_header):
+        header.update(_header)
+        special = _get_special_attributes(header, special_kwargs, parse_vars)
+        attrs, coords, variables = _special_to_properties(special)
         _verify_assertions(
-            assertions, attrs=s.attrs, variables=s.variables, coords=s.coords
+            assertions, attrs=attrs, variables=variables, coords=coords
         )
-        return s
+
+        if usevars is not None:
+            coords, variables = _project_columns(usevars, coords, variables, kwargs)
+
+        _set_header_dtypes(variables, kwargs)
+
+        if categorical_coords:
+            categorical.extend(_set_categorical_coords(coords, kwargs))
+
+        return attrs, coords, variables
+
+    read_now = not (iterate or lazy)
+    offset = 0
+
+    if isinstance(fp, string_types):
+        # open in binary mode so the data section can be handed to the
+        # C or pyarrow engines directly from the end of the header
+        with _open_data(fp, memory_map=memory_map, compression=compression) as f:
+            _header, offset = _read_path_header(
+                fp, f=f, cache=cache, encoding=kwargs.get("encoding")
+            )
+            attrs, coords, variables = _check_header(_header)
+
+            if rows is not None:
+                window = _row_window(fp, rows, offset, kwargs)
+
+            if where is not None:
+                runs = _where_runs(fp, where, offset, kwargs)
+
+            if data_cache:
+                from .arrow import from_arrow
+
+                cache_file = cache_path(fp, data_cache)
+                key = cache_key(fp, header, options)
+                table = load_cache(cache_file, key)
+
+                if table is not None:
+                    return from_arrow(table, squeeze=squeeze)
+
+            if read_now:
+                data = _read_frame(f, offset, args, kwargs, window=window, runs=runs)
+
     else:
-        _verify_assertions(
-            assertions, attrs=df.attrs, variables=df.variables, coords=df.coords
+        attrs, coords, variables = _check_header(_parse_headered_data(fp))
+        offset = fp.tell()
+
+        if rows is not None:
+            _row_window(fp, rows, offset, kwargs)
+
+        if where is not None:
+            _where_runs(fp, where, offset, kwargs)
+
+        if read_now:
+            data = pd.read_csv(fp, *args, **kwargs)
+
+    if iterate:
+        return _read_chunks(
+            fp,
+            args,
+            kwargs,
+            attrs,
+            coords,
+            variables,
+            offset=offset,
+            memory_map=memory_map,
+            categorical=categorical,
+            compression=compression,
+            window=window,
         )
-        return df
+
+    if lazy:
+
+        def _load(attrs, coords, variables):
+            data = _read_data(
+                fp,
+                args,
+                kwargs,
+                offset=offset,
+                memory_map=memory_map,
+                categorical=categorical,
+                compression=compression,
+                window=window,
+                runs=runs,
+                where=where,
+            )
+            return _to_container(data, attrs, coords, variables, squeeze=squeeze)
+
+        return LazyContainer(_load, attrs=attrs, coords=coords, variables=variables)
+
+    data = _filter_where(_restore_category_types(data, categorical), where)
+
+    container = _to_container(data, attrs, coords, variables, squeeze=squeeze)
+
+    if data_cache:
+        write_cache(cache_file, key, container)
+
+    return container
 
 
 def read_pickle(fp, assertions=None, *args, **kwargs):
     """
     Read a pandas or metacsv pickle file into a metacsv container
 
+    Files written by :py:meth:`Container.to_pickle` are read with their
+    out-of-band buffers; other pickles are read with pandas.read_pickle.
+    pandas objects are converted to metacsv containers.
+
     Args:
-        fp (str or buffer): ffilepath or buffer to read
+        fp (str or buffer): filepath or binary buffer to read
 
     Kwargs:
         assertions (dict-like): dictionary of values to assert in file header
 
     *args, **kwargs passed to pandas.read_pickle
+
+    Example:
+
+        >>> import metacsv, io
+        >>> df = metacsv.DataFrame({'x': [1, 2]}, attrs={'author': 'me'})
+        >>> buf = io.BytesIO()
+        >>> df.to_pickle(buf)
+        >>> _ = buf.seek(0)
+        >>> metacsv.read_pickle(buf, assertions={'author': 'me'}).attrs
+        Attributes
+            author:         me
     """
 
-    return _verify_assertions(pd.read_pickle(fp, *args, **kwargs), assertions)
+    if isinstance(fp, string_types):
+        with open(fp, "rb") as f:
+            magic = f.read(len(PICKLE_MAGIC))
+    else:
+        pos = fp.tell()
+        magic = fp.read(len(PICKLE_MAGIC))
+        fp.seek(pos)
+
+    if magic == PICKLE_MAGIC:
+        container = read_pickle_file(fp)
+    else:
+        container = pd.read_pickle(fp, *args, **kwargs)
+
+    if not isinstance(container, Container):
+        if isinstance(container, pd.Series):
+            container = Series(container)
+        elif isinstance(container, pd.DataFrame):
+            container = DataFrame(container)
+        else:
+            raise TypeError(
+                "Unpickled object is not a Series or DataFrame: {}".format(
+                    type(container)
+                )
+            )
+
+    _verify_assertions(
+        assertions,
+        attrs=container.attrs,
+        coords=container.coords,
+        variables=container.variables,
+    )
+
+    return container
+
+
+def _expand_paths(paths_or_glob):
+    if isinstance(paths_or_glob, string_types):
+        paths = sorted(glob.glob(paths_or_glob))
+        if len(paths) == 0:
+            raise IOError("No files match '{}'".format(paths_or_glob))
+        return paths
+
+    return list(paths_or_glob)
+
+
+def _read_one(fp, kwargs):
+    # returns plain pandas data and header dicts, which are cheaper to send
+    # back from a worker process than a metacsv container
+    container = read_csv(fp, **kwargs)
+    return (
+        container.to_pandas(),
+        container.attrs.data,
+        container.coords._coords,
+        container.variables.data,
+    )
+
+
+def _merge_properties(prop, values):
+    """
+    Merge attrs or variables from many files
+
+    Identical entries collapse into one. Entries whose values differ between
+    files are dropped from the result and reported with a warning.
+    """
+
+    merged = OrderedDict()
+    conflicts = []
+
+    for props in values:
+        for key, value in iteritems(props or {}):
+            if key in conflicts:
+                continue
+
+            if key in merged and merged[key] != value:
+                conflicts.append(key)
+                del merged[key]
+
+            elif key not in merged:
+                merged[key] = value
+
+    if len(conflicts) > 0:
+        warnings.warn(
+            "Conflicting {} dropped from merged header: {}".format(
+                prop, ", ".join(map(str, conflicts))
+            )
+        )
+
+    return merged
+
+
+def _coord_graph(coords):
+    """
+    Return coordinate definitions in a form which can be compared
+
+    Dependency lists are built from sets, so their order can differ between
+    processes and files.
+    """
+
+    return dict(
+        (k, None if v is None else sorted(v)) for k, v in iteritems(coords or {})
+    )
+
+
+def read_many(paths_or_glob, workers=None, source_coord=None, **kwargs):
+    """
+    Read many metacsv files sharing a schema into a single container
+
+    Files are parsed concurrently in a process pool and concatenated in the
+    order given (glob patterns are sorted).
+
+    Args:
+        paths_or_glob (str or list): glob pattern or list of file paths
+
+    Kwargs:
+        workers (int): number of worker processes. Defaults to the number of
+            processors; ``workers=1`` reads the files serially in this process.
+        source_coord (str): if provided, add a base coordinate with this name
+            identifying the file each row was read from
+
+    **kwargs passed to metacsv.read_csv. These (including any assertions)
+    must be picklable when reading with more than one worker.
+
+    Returns:
+        a metacsv.DataFrame or metacsv.Series. Attributes and variables that
+        are identical across files are kept once; conflicting entries are
+        dropped with a warning. All files must define the same coords.
+    """
+
+    paths = _expand_paths(paths_or_glob)
+
+    if workers == 1 or len(paths) <= 1:
+        results = [_read_one(fp, kwargs) for fp in paths]
+
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_read_one, paths, [kwargs] * len(paths)))
+
+    frames, attrs, coords, variables = zip(*results)
+
+    for fp, file_coords in zip(paths[1:], coords[1:]):
+        if _coord_graph(file_coords) != _coord_graph(coords[0]):
+            raise ValueError(
+                "Coordinates of '{}' do not match those of '{}'".format(fp, paths[0])
+            )
+
+    coords = OrderedDict(coords[0] or {})
+
+    if source_coord is not None:
+        data = pd.concat(frames, keys=paths, names=[source_coord])
+
+        if len(coords) == 0:
+            data.index = data.index.droplevel(-1)
+
+        coords = OrderedDict([(source_coord, None)] + list(coords.items()))
+
+    else:
+        data = pd.concat(frames, ignore_index=(len(coords) == 0))
+
+    container = Series if len(data.shape) == 1 else DataFrame
+
+    return container(
+        data,
+        attrs=_merge_properties("attrs", attrs),
+        coords=coords if len(coords) > 0 else None,
+        variables=_merge_properties("variables", variables),
+    )
+
+
+def validate_headers(
+    paths_or_glob, assertions, header_file=None, parse_vars=False, header_cache=None
+):
+    """
+    Check the headers of many files against assertions without reading data
+
+    Args:
+        paths_or_glob (str or list): glob pattern or list of file paths
+        assertions (dict-like): dictionary of values to assert in file headers
+
+    Kwargs:
+        header_file (str): optional supplemental yaml header file
+        parse_vars (bool): parse compact-style variable definitions
+        header_cache (bool or HeaderCache): reuse previously parsed headers
+
+    Returns:
+        OrderedDict mapping each file that fails validation to the error
+        raised. An empty result means every file passed.
+    """
+
+    failures = OrderedDict()
+
+    for fp in _expand_paths(paths_or_glob):
+        try:
+            read_header(
+                fp,
+                header_file=header_file,
+                parse_vars=parse_vars,
+                assertions=assertions,
+                header_cache=header_cache,
+            )
+        except (AssertionError, KeyError, TypeError, ValueError) as e:
+            failures[fp] = e
+
+    return failures
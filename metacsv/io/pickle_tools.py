@@ -0,0 +1,198 @@
+"""
+Pickle metacsv containers with out-of-band buffers
+
+With pickle protocol 5 (Python 3.8+), the numeric blocks of a container are
+handed to the writer as buffers rather than being copied into the pickle
+stream. Files written by :py:func:`to_pickle` hold the pickle stream
+followed by these buffers, and :py:func:`read_pickle_file` reads each
+buffer directly into the memory used by the unpickled arrays.
+
+On older Pythons, and when the file is compressed, containers are written
+as ordinary pickles by :py:func:`pandas.to_pickle`.
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    with_statement,
+    unicode_literals,
+)
+
+import os
+import struct
+import pandas as pd
+from .._compat import string_types, pickle
+
+MAGIC = b"METACSV-PICKLE5\n"
+OUT_OF_BAND = getattr(pickle, "HIGHEST_PROTOCOL", 2) >= 5
+
+_COUNTS = struct.Struct("<QQ")
+
+# extensions from which pandas infers a compression
+_COMPRESSED_EXTENSIONS = (".gz", ".bz2", ".xz", ".zip", ".zst")
+
+
+def _out_of_band(protocol=None):
+    """Check whether buffers are written out of band with protocol"""
+    return OUT_OF_BAND and (protocol is None or protocol >= 5)
+
+
+def dumps(obj, protocol=None):
+    """
+    Pickle obj, returning the pickle stream and a list of out-of-band
+    :py:class:`pickle.PickleBuffer` objects
+
+    Pass both to :py:func:`loads`, e.g. to send a container to another
+    process without copying its data into the stream.
+    """
+
+    if not _out_of_band(protocol):
+        return pickle.dumps(obj, protocol or pickle.HIGHEST_PROTOCOL), []
+
+    buffers = []
+    payload = pickle.dumps(obj, protocol=protocol or 5, buffer_callback=buffers.append)
+
+    return payload, buffers
+
+
+def loads(payload, buffers=()):
+    """Unpickle an object pickled by :py:func:`dumps`"""
+
+    if not OUT_OF_BAND:
+        return pickle.loads(payload)
+
+    return pickle.loads(payload, buffers=buffers)
+
+
+def _write(f, obj, protocol=None):
+    payload, buffers = dumps(obj, protocol=protocol)
+
+    # plain pickles have no magic header, so they can also be read by
+    # pandas.read_pickle
+    if not _out_of_band(protocol):
+        f.write(payload)
+        return
+
+    raw = [buf.raw() for buf in buffers]
+
+    f.write(MAGIC)
+    f.write(_COUNTS.pack(len(payload), len(raw)))
+    f.write(struct.pack("<{}Q".format(len(raw)), *[r.nbytes for r in raw]))
+    f.write(payload)
+
+    for r in raw:
+        f.write(r)
+
+
+def _is_compressed(fp, compression):
+    if compression != "infer":
+        return compression is not None
+
+    return (
+        isinstance(fp, string_types)
+        and os.path.splitext(fp)[1].lower() in _COMPRESSED_EXTENSIONS
+    )
+
+
+def to_pickle(obj, fp, protocol=None, compression="infer", storage_options=None):
+    """
+    Pickle obj to a file path or binary file object
+
+    Parameters
+    ----------
+
+    obj : object
+
+        The object to pickle, usually a metacsv container
+
+    fp : str or buffer
+
+        Path or binary file object to which to write
+
+    protocol : int
+
+        Pickle protocol. Defaults to 5 where supported. Out-of-band buffers
+        are only used with protocol 5.
+
+    compression : str or None
+
+        Compression of the file, as in :py:func:`pandas.to_pickle`. If
+        ``'infer'`` (default), it is inferred from the extension of fp.
+        Compressed files are written as ordinary pickles.
+
+    storage_options : dict
+
+        Passed to :py:func:`pandas.to_pickle`. Files written to remote
+        storage are ordinary pickles.
+
+    """
+
+    if _is_compressed(fp, compression) or storage_options is not None:
+        kwargs = dict(compression=compression)
+        if protocol is not None:
+            kwargs["protocol"] = protocol
+        if storage_options is not None:
+            kwargs["storage_options"] = storage_options
+
+        pd.to_pickle(obj, fp, **kwargs)
+        return
+
+    if isinstance(fp, string_types):
+        with open(fp, "wb") as f:
+            _write(f, obj, protocol=protocol)
+    else:
+        _write(fp, obj, protocol=protocol)
+
+
+def _readinto(f, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    pos = 0
+
+    while pos < size:
+        n = f.readinto(view[pos:])
+        if not n:
+            raise EOFError("metacsv pickle file is truncated")
+        pos += n
+
+    return buf
+
+
+def _read(f):
+    counts = f.read(_COUNTS.size)
+    nbytes, nbuffers = _COUNTS.unpack(counts)
+    sizes = struct.unpack(
+        "<{}Q".format(nbuffers), f.read(struct.calcsize("<Q") * nbuffers)
+    )
+
+    payload = _readinto(f, nbytes)
+    buffers = [_readinto(f, size) for size in sizes]
+
+    return loads(payload, buffers)
+
+
+def is_pickle_file(fp):
+    """Check whether the file at path fp was written by :py:func:`to_pickle`
+    with out-of-band buffers"""
+
+    with open(fp, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_pickle_file(fp):
+    """
+    Unpickle an object written by :py:func:`to_pickle` with out-of-band
+    buffers from a file path or binary file object
+    """
+
+    if isinstance(fp, string_types):
+        with open(fp, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("{} is not a metacsv pickle file".format(fp))
+            return _read(f)
+
+    if fp.read(len(MAGIC)) != MAGIC:
+        raise ValueError("buffer is not a metacsv pickle file")
+
+    return _read(fp)
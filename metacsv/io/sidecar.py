@@ -0,0 +1,494 @@
+"""
+Sidecar row index for random access into large metacsv files
+
+The index is stored next to the csv (``data.csv`` is indexed by
+``data.csv.mcidx``) and records the offset of the data section, the number
+of rows, and the byte offset of every ``block_rows``-th row, so
+:py:func:`metacsv.read_csv` can seek straight to the block containing the
+first requested row.
+
+The index can also hold the minimum and maximum of coordinate columns in
+each block, which lets ``read_csv(where=...)`` skip blocks that cannot
+contain matching rows.
+
+The index assumes one record per line: files with quoted line breaks or
+blank lines in the data section should not be indexed.
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    with_statement,
+    unicode_literals,
+)
+
+import os
+import io
+import json
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from .._compat import string_types
+
+INDEX_EXTENSION = ".mcidx"
+INDEX_VERSION = 1
+SCAN_BLOCKSIZE = 1024 * 1024
+
+
+def index_path(fp):
+    """Return the path of the sidecar index of the file at path fp"""
+    return fp + INDEX_EXTENSION
+
+
+def _source_key(fp):
+    stat = os.stat(fp)
+    return stat.st_size, getattr(stat, "st_mtime_ns", stat.st_mtime)
+
+
+def _header_rows(header):
+    """
+    Return the number of column header lines pandas reads given the value of
+    ``pandas.read_csv``'s ``header`` argument
+    """
+
+    if header is None:
+        return 0
+
+    if header == "infer":
+        return 1
+
+    if isinstance(header, (list, tuple)):
+        return max(header) + 1
+
+    return header + 1
+
+
+class SidecarIndex(object):
+    """
+    Row offsets of a metacsv file
+
+    Attributes
+    ----------
+
+    data_offset : int
+
+        Position at which the data section (including the column header)
+        starts. For compressed files, positions are offsets into the
+        decompressed stream.
+
+    header_rows : int
+
+        Number of column header lines at the start of the data section
+
+    block_rows : int
+
+        Number of rows between recorded offsets
+
+    nrows : int
+
+        Number of rows in the data section, excluding the column header
+
+    offsets : list
+
+        Position of rows ``0``, ``block_rows``, ``2 * block_rows``, ...
+
+    stats : dict
+
+        Per-block ``[min, max]`` pairs of columns, keyed by column name.
+        Bounds of blocks with no values are None.
+
+    """
+
+    def __init__(
+        self,
+        data_offset,
+        header_rows,
+        block_rows,
+        nrows,
+        offsets,
+        source=None,
+        stats=None,
+    ):
+        self.data_offset = data_offset
+        self.header_rows = header_rows
+        self.block_rows = block_rows
+        self.nrows = nrows
+        self.offsets = offsets
+        self.source = source
+        self.stats = stats if stats is not None else OrderedDict()
+
+    def locate(self, row):
+        """
+        Return the position of the block containing row and the number of
+        rows to skip from that position to reach it
+        """
+
+        block = min(row // self.block_rows, len(self.offsets) - 1)
+        return self.offsets[block], row - block * self.block_rows
+
+    def match_blocks(self, where):
+        """
+        Return the runs of consecutive blocks which may contain rows matching
+        where, as a list of (position, first row, number of rows) triples
+
+        See :py:func:`metacsv.read_csv` for the format of where. Conditions
+        on columns without statistics match every block.
+        """
+
+        where = _normalize_where(where)
+        runs = []
+
+        for block, offset in enumerate(self.offsets):
+            matches = True
+            for col, cond in where.items():
+                if col in self.stats and not _block_may_match(
+                    cond, *self.stats[col][block]
+                ):
+                    matches = False
+                    break
+
+            if not matches:
+                continue
+
+            start = block * self.block_rows
+            nrows = min(self.block_rows, self.nrows - start)
+
+            if runs and runs[-1][1] + runs[-1][2] == start:
+                runs[-1] = (runs[-1][0], runs[-1][1], runs[-1][2] + nrows)
+            else:
+                runs.append((offset, start, nrows))
+
+        return runs
+
+    def is_current(self, fp):
+        """Check whether the index was built from the current version of fp"""
+        return self.source is not None and tuple(self.source) == _source_key(fp)
+
+    def to_dict(self):
+        return OrderedDict(
+            [
+                ("version", INDEX_VERSION),
+                ("source", list(self.source or [])),
+                ("data_offset", self.data_offset),
+                ("header_rows", self.header_rows),
+                ("block_rows", self.block_rows),
+                ("nrows", self.nrows),
+                ("offsets", self.offsets),
+                ("stats", self.stats),
+            ]
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(
+                "Unsupported metacsv index version {}".format(data.get("version"))
+            )
+
+        return cls(
+            data["data_offset"],
+            data["header_rows"],
+            data["block_rows"],
+            data["nrows"],
+            data["offsets"],
+            source=data.get("source"),
+            stats=data.get("stats"),
+        )
+
+    def __repr__(self):
+        return "<{} nrows={} block_rows={} blocks={}>".format(
+            type(self).__name__, self.nrows, self.block_rows, len(self.offsets)
+        )
+
+
+def load_index(fp):
+    """
+    Return the :py:class:`SidecarIndex` of the file at path fp, or None if
+    the file has no index or its index is out of date
+    """
+
+    path = index_path(fp)
+
+    if not os.path.isfile(path):
+        return None
+
+    with io.open(path, "r", encoding="utf-8") as f:
+        index = SidecarIndex.from_dict(json.load(f, object_pairs_hook=OrderedDict))
+
+    if not index.is_current(fp):
+        return None
+
+    return index
+
+
+def _scan_rows(f, header_rows, block_rows, blocksize=SCAN_BLOCKSIZE):
+    """
+    Count the rows from the current position of a binary file object and
+    record the position of every block_rows-th row
+    """
+
+    pos = f.tell()
+    lines = 0
+    last = b"\n"
+
+    # with no column header, the first row starts right away
+    offsets = [pos] if header_rows == 0 else []
+
+    while True:
+        block = f.read(blocksize)
+        if not block:
+            break
+
+        newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10)
+
+        # the row number of the line following each newline
+        rows = lines + np.arange(1, len(newlines) + 1) - header_rows
+        starts = newlines[(rows >= 0) & (rows % block_rows == 0)] + pos + 1
+        offsets.extend(starts.tolist())
+
+        lines += len(newlines)
+        pos += len(block)
+        last = block[-1:]
+
+    nrows = max(lines - header_rows + (0 if last == b"\n" else 1), 0)
+
+    # an offset at the end of the file follows a trailing newline, not a row
+    return nrows, offsets[: (nrows + block_rows - 1) // block_rows]
+
+
+def _normalize_where(where):
+    """
+    Return where as a dict of ("range", low, high) or ("in", values)
+    conditions
+    """
+
+    conditions = OrderedDict()
+
+    for col, cond in where.items():
+        if isinstance(cond, tuple):
+            if len(cond) != 2:
+                raise ValueError(
+                    "where ranges must be (low, high) tuples, got {}".format(cond)
+                )
+            conditions[col] = ("range",) + cond
+        elif isinstance(cond, (list, set, frozenset)):
+            conditions[col] = ("in", list(cond))
+        else:
+            conditions[col] = ("range", cond, cond)
+
+    return conditions
+
+
+def _block_may_match(cond, low, high):
+    if low is None or high is None:
+        return True
+
+    try:
+        if cond[0] == "in":
+            return any(low <= value <= high for value in cond[1])
+
+        _, lower, upper = cond
+        return (lower is None or lower <= high) and (upper is None or low <= upper)
+
+    # values which cannot be compared with the statistics never prune a block
+    except TypeError:
+        return True
+
+
+def _to_json_value(value):
+    if pd.isnull(value):
+        return None
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, string_types) or isinstance(value, (int, float)):
+        return value
+    return str(value)
+
+
+def _block_stats(f, columns, block_rows, **kwargs):
+    """
+    Return per-block [min, max] pairs of columns in the data section read
+    from binary file object f
+    """
+
+    stats = OrderedDict((col, []) for col in columns)
+
+    reader = pd.read_csv(f, usecols=list(columns), chunksize=block_rows, **kwargs)
+    for chunk in reader:
+        for col in columns:
+            stats[col].append(
+                [_to_json_value(chunk[col].min()), _to_json_value(chunk[col].max())]
+            )
+
+    return stats
+
+
+def build_index(
+    fp, block_rows=10000, header_rows=1, stats=None, compression="infer", **kwargs
+):
+    """
+    Write a sidecar row index for the metacsv file at path fp
+
+    Parameters
+    ----------
+
+    fp : str
+
+        Path to a metacsv-formatted csv
+
+    block_rows : int
+
+        Number of rows between recorded offsets (default 10000). Smaller
+        blocks make reads of small windows faster at the cost of a larger
+        index.
+
+    header_rows : int
+
+        Number of column header lines at the start of the data section
+        (default 1)
+
+    stats : list
+
+        Columns for which to record the minimum and maximum of each block.
+        By default, statistics are recorded for the coordinates declared in
+        the header. Pass an empty list to skip them. Statistics require a
+        single column header line.
+
+    compression : str
+
+        Compression of fp (see :py:func:`metacsv.io.compression.infer_compression`)
+
+    **kwargs :
+
+        passed to pandas.read_csv when computing statistics
+
+    Returns
+    -------
+
+    index : SidecarIndex
+
+    """
+
+    from .parsers import _open_data, _read_path_header
+
+    if block_rows < 1:
+        raise ValueError("block_rows must be a positive integer")
+
+    source = _source_key(fp)
+
+    with _open_data(fp, compression=compression) as f:
+        header, data_offset = _read_path_header(fp, f=f)
+        nrows, offsets = _scan_rows(f, header_rows, block_rows)
+
+        if stats is None:
+            coords = header.get("coords") or []
+            stats = [coords] if isinstance(coords, string_types) else list(coords)
+
+        if stats and header_rows == 1 and nrows > 0:
+            f.seek(data_offset)
+            stats = _block_stats(f, stats, block_rows, **kwargs)
+        else:
+            stats = None
+
+    index = SidecarIndex(
+        data_offset,
+        header_rows,
+        block_rows,
+        nrows,
+        offsets,
+        source=list(source),
+        stats=stats,
+    )
+
+    write_index(fp, index)
+
+    return index
+
+
+def write_index(fp, index):
+    """Store a :py:class:`SidecarIndex` as the sidecar index of path fp"""
+
+    with io.open(index_path(fp), "w", encoding="utf-8") as f:
+        f.write(json.dumps(index.to_dict()))
+
+
+def extend_index(fp, index, compression="infer", **kwargs):
+    """
+    Update the sidecar index of path fp after rows were appended to the file
+
+    Only the rows from the start of the last indexed block onward are
+    scanned, and statistics are recomputed for those blocks only.
+
+    Parameters
+    ----------
+
+    fp : str
+
+        Path to a metacsv-formatted csv
+
+    index : SidecarIndex
+
+        Index of fp from before the rows were appended
+
+    compression : str
+
+        Compression of fp (see :py:func:`metacsv.io.compression.infer_compression`)
+
+    **kwargs :
+
+        csv dialect options the file was written with (e.g. ``sep``), passed
+        to pandas.read_csv when recomputing statistics
+
+    Returns
+    -------
+
+    index : SidecarIndex
+
+    """
+
+    from .parsers import _open_data
+
+    if len(index.offsets) == 0:
+        return build_index(
+            fp,
+            block_rows=index.block_rows,
+            header_rows=index.header_rows,
+            stats=list(index.stats) or None,
+            compression=compression,
+            **kwargs
+        )
+
+    last = len(index.offsets) - 1
+    source = _source_key(fp)
+
+    with _open_data(fp, compression=compression) as f:
+        f.seek(index.offsets[last])
+        nrows, offsets = _scan_rows(f, 0, index.block_rows)
+
+        stats = OrderedDict()
+        if len(index.stats) > 0:
+            f.seek(index.data_offset)
+            names = list(pd.read_csv(f, nrows=0, **kwargs).columns)
+
+            f.seek(index.offsets[last])
+            stats = _block_stats(
+                f,
+                list(index.stats),
+                index.block_rows,
+                header=None,
+                names=names,
+                **kwargs
+            )
+
+    index.offsets = index.offsets[:last] + offsets
+    index.nrows = last * index.block_rows + nrows
+    index.stats = OrderedDict(
+        (col, block_stats[:last] + stats[col])
+        for col, block_stats in index.stats.items()
+    )
+    index.source = list(source)
+
+    write_index(fp, index)
+
+    return index
@@ -1,9 +1,94 @@
-from collections import OrderedDict
+import io
+import numpy as np
+import pandas as pd
+from collections import OrderedDict, deque
 from .yaml_tools import ordered_dump
+from .compression import infer_compression, open_compressed
+from .sidecar import build_index
 from .._compat import string_types, has_iterkeys, iterkeys, text_type, text_to_native
 
 
-def _header_to_file_object(fp, attrs=None, coords=None, variables=None):
+def _get_dtype_name(dtype):
+    """
+    Return the name of a dtype to declare in a header, or None if the
+    parser would infer the dtype on its own
+    """
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "category" if dtype.categories.dtype == object else None
+
+    if dtype.kind in "iuf" and dtype not in (np.dtype("int64"), np.dtype("float64")):
+        return str(dtype)
+
+    return None
+
+
+def _variables_with_dtypes(container, variables=None):
+    """
+    Add ``dtype`` entries to variable metadata for columns and coordinates
+    of the container that have compact or categorical dtypes
+
+    Entries that already declare a dtype are left unchanged. The container's
+    own variables are not modified.
+    """
+
+    from ..core.internals import Variables
+
+    if variables is None:
+        variables = container.variables
+
+    if hasattr(container, "columns"):
+        dtypes = list(container.dtypes.items())
+    elif container.name is not None:
+        dtypes = [(container.name, container.dtype)]
+    else:
+        dtypes = []
+
+    for name in container.index.names:
+        if name is not None:
+            dtypes.append((name, container.index.get_level_values(name).dtype))
+
+    data = OrderedDict(variables.items())
+
+    for name, dtype in dtypes:
+        dtype_name = _get_dtype_name(dtype)
+        if dtype_name is None:
+            continue
+
+        var = data.get(name)
+        if var is None:
+            var = OrderedDict()
+        elif isinstance(var, string_types):
+            var = Variables.parse_string_var(var)
+            if isinstance(var, string_types):
+                continue
+
+        if "dtype" in var:
+            continue
+
+        var = OrderedDict(var)
+        var["dtype"] = dtype_name
+        data[name] = var
+
+    return Variables(data) if len(data) > 0 else variables
+
+
+def _padding_line(nbytes):
+    """
+    Return a yaml comment line exactly nbytes long, used to reserve space in
+    a header for later in-place updates
+    """
+
+    if nbytes <= 0:
+        return ""
+
+    if nbytes == 1:
+        return "\n"
+
+    return "#" + " " * (nbytes - 2) + "\n"
+
+
+def _header_to_file_object(fp, attrs=None, coords=None, variables=None, padding=0):
 
     attr_dict = OrderedDict()
 
@@ -16,62 +101,399 @@ def _header_to_file_object(fp, attrs=None, coords=None, variables=None):
     if variables != None:
         attr_dict.update({"variables": variables.data})
 
-    if len(attr_dict) > 0:
+    if len(attr_dict) > 0 or padding > 0:
         fp.write(text_to_native(("---\n"), "utf-8"))
-        fp.write(
-            text_to_native(
-                ordered_dump(attr_dict, default_flow_style=False, allow_unicode=True),
-                "utf-8",
+        if len(attr_dict) > 0:
+            fp.write(
+                text_to_native(
+                    ordered_dump(
+                        attr_dict, default_flow_style=False, allow_unicode=True
+                    ),
+                    "utf-8",
+                )
             )
-        )
+        fp.write(text_to_native(_padding_line(padding), "utf-8"))
         fp.write(text_to_native(("...\n"), "utf-8"))
 
 
+def _pandas_chunksize(data, kwargs):
+    """
+    Return the number of rows pandas formats at a time when writing data
+    """
+
+    if kwargs.get("chunksize"):
+        return int(kwargs["chunksize"])
+
+    if kwargs.get("columns") is not None:
+        ncols = len(kwargs["columns"])
+    else:
+        ncols = len(data.columns) if hasattr(data, "columns") else 1
+
+    # same default as pandas' CSVFormatter
+    return (100000 // (ncols or 1)) or 1
+
+
+def _format_block(data, kwargs):
+    return data.to_csv(None, **kwargs)
+
+
+def _write_blocks(data, fp, workers, encoding="utf-8", **kwargs):
+    """
+    Format row blocks of data in a pool of worker processes and write them
+    to fp in order
+
+    pandas formats rows in chunks, and the formatting of some dtypes (e.g.
+    whether datetimes are written with their times) depends on the values
+    in each chunk. Blocks are made of whole pandas chunks and formatted with
+    the same chunksize, so the output is identical to that of a single
+    pandas.to_csv call.
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = _pandas_chunksize(data, kwargs)
+    kwargs["chunksize"] = chunksize
+
+    nchunks = -(-len(data) // (workers * 4 * chunksize))
+    block_rows = max(nchunks, 1) * chunksize
+
+    starts = list(range(0, len(data), block_rows))
+
+    # blocks are formatted as text, and encoded here for binary handles
+    binary = isinstance(fp, (io.RawIOBase, io.BufferedIOBase)) or "b" in getattr(
+        fp, "mode", ""
+    )
+
+    def _write(block):
+        fp.write(block.encode(encoding) if binary else block)
+
+    # keep a bounded number of blocks in flight, so at most a few formatted
+    # blocks are held in memory at once
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        for i, start in enumerate(starts):
+            block_kwargs = dict(kwargs)
+            if i > 0:
+                block_kwargs["header"] = False
+
+            pending.append(
+                executor.submit(
+                    _format_block, data.iloc[start : start + block_rows], block_kwargs
+                )
+            )
+
+            if len(pending) >= 2 * workers:
+                _write(pending.popleft().result())
+
+        while pending:
+            _write(pending.popleft().result())
+
+
 def _container_to_csv_object(container, fp, *args, **kwargs):
+    # to_pandas wraps the container's data without copying it
     encoding = kwargs.pop("encoding", "utf-8")
-    container.pandas_parent.to_csv(
-        container.to_pandas(), fp, *args, encoding=encoding, **kwargs
+    workers = kwargs.pop("workers", None)
+
+    data = container.to_pandas()
+
+    if workers is not None and workers > 1 and len(args) == 0 and len(data) > 0:
+        _write_blocks(data, fp, workers, encoding=encoding, **kwargs)
+        return
+
+    container.pandas_parent.to_csv(data, fp, *args, encoding=encoding, **kwargs)
+
+
+def _open_output(fp, compression="infer"):
+    """
+    Open a file path for writing, compressing it if its extension (or
+    compression) names a supported compression
+    """
+
+    if infer_compression(fp, compression) is not None:
+        return open_compressed(text_type(fp), "w", compression=compression)
+
+    return open(text_type(fp), "w+")
+
+
+def _written_header_rows(container, kwargs):
+    """
+    Return the number of column header lines pandas writes for container
+    """
+
+    if kwargs.get("header", True) is False:
+        return 0
+
+    if not hasattr(container, "columns") or container.columns.nlevels == 1:
+        return 1
+
+    # pandas writes index names on their own line below multi-level columns
+    index_names = kwargs.get("index", True) and any(
+        name is not None for name in container.index.names
+    )
+
+    return container.columns.nlevels + (1 if index_names else 0)
+
+
+def _dialect_kwargs(kwargs):
+    """
+    Return the pandas.to_csv options which pandas.read_csv needs, under the
+    same names, to read the written file back
+    """
+
+    return dict(
+        (k, kwargs[k])
+        for k in ["sep", "quotechar", "escapechar", "doublequote"]
+        if k in kwargs
     )
 
 
 def metacsv_to_csv(container, fp, header_file=None, *args, **kwargs):
     separate_header = False
 
+    # compression is applied to the whole file, header included, so it is
+    # handled here rather than by pandas
+    compression = kwargs.pop("compression", "infer")
+
+    # True or a number of rows per block to write a sidecar row index
+    row_index = kwargs.pop("row_index", None)
+
+    # bytes reserved in the header so metacsv.update_header can grow it in
+    # place
+    header_padding = kwargs.pop("header_padding", 0)
+
     if (header_file is not None) and (header_file != fp):
         separate_header = True
 
+    variables = _variables_with_dtypes(container)
+
     if separate_header:
         metacsv_to_header(
             header_file,
             attrs=container.attrs,
             coords=container.coords,
-            variables=container.variables,
+            variables=variables,
         )
 
     if isinstance(fp, string_types):
-        with open(text_type(fp), "w+") as fp2:
+        with _open_output(fp, compression) as fp2:
             if not separate_header:
                 _header_to_file_object(
                     fp2,
                     attrs=container.attrs,
                     coords=container.coords,
-                    variables=container.variables,
+                    variables=variables,
+                    padding=header_padding,
                 )
             _container_to_csv_object(container, fp2, *args, **kwargs)
+
+        if row_index:
+            build_index(
+                fp,
+                block_rows=10000 if row_index is True else row_index,
+                header_rows=_written_header_rows(container, kwargs),
+                compression=compression,
+                **_dialect_kwargs(kwargs)
+            )
+
     else:
         if not separate_header:
             _header_to_file_object(
                 fp,
                 attrs=container.attrs,
                 coords=container.coords,
-                variables=container.variables,
+                variables=variables,
+                padding=header_padding,
             )
         _container_to_csv_object(container, fp, *args, **kwargs)
 
 
-def metacsv_to_header(fp, attrs=None, coords=None, variables=None):
+def metacsv_to_header(fp, attrs=None, coords=None, variables=None, container=None):
+    if container is not None:
+        variables = _variables_with_dtypes(container, variables)
+
     if isinstance(fp, string_types):
-        with open(text_type(fp), "w+") as fp2:
+        with _open_output(fp) as fp2:
             _header_to_file_object(fp2, attrs=attrs, coords=coords, variables=variables)
     else:
         _header_to_file_object(fp, attrs=attrs, coords=coords, variables=variables)
+
+
+class MetaCSVWriter(object):
+    """
+    Write a metacsv-formatted csv incrementally
+
+    The yaml header is written once, followed by the column header of the
+    first chunk. Each call to :py:meth:`write` then appends the rows of a
+    chunk, so the data never has to be held in memory at once.
+
+    Parameters
+    ----------
+
+    fp : str or buffer
+
+        Path or text file object to which to write. Paths ending in ``.gz``,
+        ``.bz2``, ``.xz``, or ``.zst`` are compressed.
+
+    attrs : dict
+
+        Container attributes. Defaults to the attrs of the first chunk if it
+        is a metacsv container.
+
+    coords : dict
+
+        Container coordinates. Defaults to the coords of the first chunk if
+        it is a metacsv container.
+
+    variables : dict
+
+        Variable-specific attributes. Defaults to the variables of the first
+        chunk if it is a metacsv container.
+
+    header_padding : int
+
+        Number of bytes to reserve in the header so that
+        :py:func:`metacsv.update_header` can grow it in place
+
+    **kwargs :
+
+        passed to pandas.to_csv for every chunk. ``header`` (e.g. a list of
+        column aliases, or False) applies to the first chunk only.
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        >>> import metacsv, pandas as pd
+        >>> with metacsv.MetaCSVWriter(
+        ...         'my-metacsv-data.csv',
+        ...         attrs={'author': 'my name'},
+        ...         coords={'year': None}) as writer:
+        ...     for year in [2000, 2001]:
+        ...         writer.write(pd.DataFrame(
+        ...             {'pop': [1.0]}, index=pd.Index([year], name='year')))
+        ...
+        >>> metacsv.read_csv('my-metacsv-data.csv') # doctest: +NORMALIZE_WHITESPACE
+        <metacsv.core.containers.DataFrame (2, 1)>
+              pop
+        year
+        2000  1.0
+        2001  1.0
+        <BLANKLINE>
+        Coordinates
+          * year       (year) int64 2000, 2001
+        Attributes
+            author:         my name
+
+        >>> import os
+        >>> os.remove('my-metacsv-data.csv')
+
+    """
+
+    def __init__(self, fp, attrs=None, coords=None, variables=None, **kwargs):
+        self.fp = fp
+        self.attrs = attrs
+        self.coords = coords
+        self.variables = variables
+        self.rows_written = 0
+
+        self._compression = kwargs.pop("compression", "infer")
+        self._header_padding = kwargs.pop("header_padding", 0)
+        self._header = kwargs.pop("header", True)
+        self._kwargs = kwargs
+        self._kwargs.setdefault("encoding", "utf-8")
+        self._file = None
+        self._columns = None
+        self._header_written = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _open(self):
+        if self._file is None:
+            if isinstance(self.fp, string_types):
+                self._file = _open_output(self.fp, self._compression)
+            else:
+                self._file = self.fp
+
+        return self._file
+
+    def _write_header(self, chunk=None):
+        from ..core.internals import Attributes, Coordinates, Variables
+
+        attrs, coords, variables = self.attrs, self.coords, self.variables
+
+        if chunk is not None and hasattr(chunk, "pandas_parent"):
+            attrs = chunk.attrs if attrs is None else attrs
+            coords = chunk.coords if coords is None else coords
+            variables = chunk.variables if variables is None else variables
+
+        attrs = attrs if isinstance(attrs, Attributes) else Attributes(attrs)
+        coords = coords if isinstance(coords, Coordinates) else Coordinates(coords)
+        variables = (
+            variables if isinstance(variables, Variables) else Variables(variables)
+        )
+
+        if chunk is not None:
+            variables = _variables_with_dtypes(chunk, variables)
+
+        _header_to_file_object(
+            self._open(),
+            attrs=attrs,
+            coords=coords,
+            variables=variables,
+            padding=self._header_padding,
+        )
+        self._header_written = True
+
+    def write(self, chunk):
+        """
+        Append the rows of a metacsv or pandas Series or DataFrame
+
+        Every chunk must have the same columns (or Series name) and index
+        names as the first.
+        """
+
+        if self._file is not None and self._file.closed:
+            raise ValueError("write to a closed MetaCSVWriter")
+
+        if not self._header_written:
+            self._write_header(chunk)
+
+        data = chunk.to_pandas() if hasattr(chunk, "pandas_parent") else chunk
+        columns = (
+            list(data.columns) if hasattr(data, "columns") else [data.name],
+            list(data.index.names),
+        )
+
+        first = self._columns is None
+
+        if first:
+            self._columns = columns
+        elif columns != self._columns:
+            raise ValueError(
+                "chunk columns {} do not match the columns written {}".format(
+                    columns, self._columns
+                )
+            )
+
+        data.to_csv(
+            self._file, header=self._header if first else False, **self._kwargs
+        )
+        self.rows_written += len(data)
+
+    def close(self):
+        """
+        Finish the file, writing the header if no chunk was written, and close
+        it if it was opened by the writer
+        """
+
+        if not self._header_written:
+            self._write_header()
+
+        if isinstance(self.fp, string_types) and not self._file.closed:
+            self._file.close()
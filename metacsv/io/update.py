@@ -0,0 +1,470 @@
+"""
+Edit metacsv files on disk without reading their data
+
+:py:func:`update_header` rewrites the yaml header of a file. If the new
+header fits in the space taken by the old one, including any padding
+reserved with ``to_csv(header_padding=...)``, it is written over the old
+header in place. Otherwise the data section is copied, in large blocks and
+without being parsed, into a new file behind the new header.
+
+:py:func:`append_csv` adds rows to the end of a file after checking them
+against its header and column header line.
+"""
+
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    with_statement,
+    unicode_literals,
+)
+
+import os
+import shutil
+import warnings
+import numpy as np
+from .._compat import string_types, text_type, StringIO
+from ..core.internals import Coordinates, Variables
+from .compression import infer_compression, open_compressed
+from .header_cache import default_cache
+from .parsers import (
+    _open_data,
+    _read_path_header,
+    _get_special_attributes,
+    _special_to_properties,
+    _coord_graph,
+)
+from .sidecar import load_index, write_index, extend_index, _source_key
+from .to_csv import (
+    _header_to_file_object,
+    _container_to_csv_object,
+    _variables_with_dtypes,
+    _dialect_kwargs,
+)
+
+COPY_BUFSIZE = 16 * 1024 * 1024
+
+
+def _header_bytes(attrs, coords, variables, padding=0):
+    buf = StringIO()
+    _header_to_file_object(
+        buf, attrs=attrs, coords=coords, variables=variables, padding=padding
+    )
+
+    header = buf.getvalue()
+    if isinstance(header, text_type):
+        header = header.encode("utf-8")
+
+    return header
+
+
+def _fit_header(attrs, coords, variables, size):
+    """
+    Return the header padded to exactly size bytes, or None if it does not
+    fit in size bytes
+    """
+
+    # a padding of at least one byte makes sure the fences are written, even
+    # for an empty header
+    header = _header_bytes(attrs, coords, variables, padding=1)
+    slack = size - len(header)
+
+    if slack < 0:
+        return None
+
+    return _header_bytes(attrs, coords, variables, padding=slack + 1)
+
+
+def _merge_header(header, attrs=None, coords=None, variables=None):
+    """
+    Return the attrs, coords, and variables of a parsed header updated with
+    those given
+    """
+
+    _attrs, _coords, _variables = _special_to_properties(
+        _get_special_attributes(header, {})
+    )
+
+    if attrs is not None:
+        _attrs.update(attrs)
+
+    if coords is not None:
+        coords = Coordinates(coords)
+        if _coords == None:
+            _coords = coords
+        else:
+            _coords.update(coords._coords)
+
+    if variables is not None:
+        _variables.update(variables)
+
+    return _attrs, _coords, _variables
+
+
+def _copy_with_header(fp, header, offset, compression=None):
+    """
+    Replace the file at path fp with header followed by its data section
+    """
+
+    tmp = "{}.{}.tmp".format(fp, os.getpid())
+
+    try:
+        with _open_data(fp, compression=compression) as src:
+            with open_compressed(tmp, "wb", compression=compression) as dst:
+                dst.write(header)
+                src.seek(offset)
+                shutil.copyfileobj(src, dst, COPY_BUFSIZE)
+
+        shutil.copymode(fp, tmp)
+        getattr(os, "replace", os.rename)(tmp, fp)
+
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def update_header(
+    fp,
+    attrs=None,
+    coords=None,
+    variables=None,
+    header_padding=0,
+    compression="infer",
+):
+    """
+    Update the yaml header of a metacsv file without reading its data
+
+    attrs, coords, and variables are merged into those already in the
+    header, as in :py:func:`metacsv.to_csv`.
+
+    Parameters
+    ----------
+
+    fp : str
+
+        Path to a metacsv-formatted csv or header file
+
+    attrs : dict
+
+        Attributes to add or change
+
+    coords : dict
+
+        Coordinates to add or change
+
+    variables : dict
+
+        Variable-specific attributes to add or change
+
+    header_padding : int
+
+        Bytes to reserve in the new header if the file has to be rewritten,
+        so that later updates can be made in place (see
+        :py:meth:`metacsv.DataFrame.to_csv`)
+
+    compression : str
+
+        Compression of fp (see :py:func:`metacsv.read_csv`). Compressed
+        files are always rewritten.
+
+    Returns
+    -------
+
+    in_place : bool
+
+        True if the header was written over the old header, False if the
+        file was rewritten
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        >>> import metacsv, pandas as pd
+        >>> df = metacsv.DataFrame(
+        ...     pd.DataFrame({'pop': [1.0, 2.0]}),
+        ...     attrs={'version': '1.0'})
+        >>> df.to_csv('my-metacsv-data.csv', header_padding=256)
+        >>> metacsv.update_header(
+        ...     'my-metacsv-data.csv', attrs={'version': '1.1'})
+        True
+        >>> metacsv.read_header('my-metacsv-data.csv')[0]['version']
+        '1.1'
+
+        >>> import os
+        >>> os.remove('my-metacsv-data.csv')
+
+    """
+
+    if not isinstance(fp, string_types):
+        raise ValueError("update_header requires a file path")
+
+    compression = infer_compression(fp, compression)
+
+    index = load_index(fp)
+
+    with _open_data(fp, compression=compression) as f:
+        header, offset = _read_path_header(fp, f=f)
+
+    attrs, coords, variables = _merge_header(
+        header, attrs=attrs, coords=coords, variables=variables
+    )
+
+    new_header = None
+    if compression is None and offset > 0:
+        new_header = _fit_header(attrs, coords, variables, offset)
+
+    in_place = new_header is not None
+
+    if in_place:
+        with open(fp, "r+b") as f:
+            f.write(new_header)
+
+        new_offset = offset
+
+    else:
+        new_header = _header_bytes(attrs, coords, variables, padding=header_padding)
+        _copy_with_header(fp, new_header, offset, compression=compression)
+
+        new_offset = len(new_header)
+
+    default_cache.discard(fp)
+
+    # rows keep their positions relative to the data section, so the row
+    # index only needs to be shifted
+    if index is not None:
+        shift = new_offset - offset
+        index.data_offset += shift
+        index.offsets = [pos + shift for pos in index.offsets]
+        index.source = list(_source_key(fp))
+        write_index(fp, index)
+
+    return in_place
+
+
+def _column_header(data, kwargs):
+    """
+    Return the column header lines pandas writes for data with kwargs
+    """
+
+    kwargs = dict(
+        (k, v)
+        for k, v in kwargs.items()
+        if k not in ("workers", "encoding", "chunksize")
+    )
+
+    return data.iloc[:0].to_csv(None, **kwargs)
+
+
+def _fits_dtype(values, dtype):
+    """
+    Return True if values can be written to a column declared with dtype and
+    read back without loss
+    """
+
+    values = np.asarray(values)
+
+    if dtype.kind in "iu":
+        if values.dtype.kind not in "iuf":
+            return False
+
+        if values.size == 0:
+            return True
+
+        if values.dtype.kind == "f" and not (
+            np.isfinite(values).all() and (values == np.round(values)).all()
+        ):
+            return False
+
+        info = np.iinfo(dtype)
+        return values.min() >= info.min and values.max() <= info.max
+
+    if dtype.kind == "f":
+        return values.dtype.kind in "iuf"
+
+    return True
+
+
+def _check_dtypes(fp, data, declared):
+    """
+    Raise a ValueError if a column or index level of data cannot be read
+    with the dtype declared for it in the header of the file at path fp
+    """
+
+    columns = [(data.name, data)] if not hasattr(data, "columns") else data.items()
+    levels = [
+        (name, data.index.get_level_values(name))
+        for name in data.index.names
+        if name is not None
+    ]
+
+    for name, values in list(columns) + levels:
+        var = declared.get(name)
+        if isinstance(var, string_types):
+            var = Variables.parse_string_var(var)
+
+        if not isinstance(var, dict) or var.get("dtype") in (None, "category"):
+            continue
+
+        try:
+            dtype = np.dtype(var["dtype"])
+        except TypeError:
+            continue
+
+        if not _fits_dtype(values, dtype):
+            raise ValueError(
+                "Values of '{}' cannot be read as its declared dtype {} in "
+                "'{}'".format(name, dtype, fp)
+            )
+
+
+def _check_compatible(fp, container, file_coords, file_variables):
+    """
+    Raise a ValueError if the coords or variables of container conflict with
+    those in the header of the file at path fp
+    """
+
+    if len(container.coords) > 0 and _coord_graph(
+        container.coords._coords
+    ) != _coord_graph(file_coords._coords):
+        raise ValueError(
+            "Coordinates {} do not match those of '{}' {}".format(
+                list(container.coords), fp, list(file_coords)
+            )
+        )
+
+    declared = file_variables.data or {}
+
+    for name, var in _variables_with_dtypes(container).items():
+        if name not in declared:
+            raise ValueError(
+                "Variable '{}' is not declared in the header of '{}'. Add it "
+                "with metacsv.update_header first.".format(name, fp)
+            )
+
+        if declared[name] != var:
+            raise ValueError(
+                "Variable '{}' ({}) does not match its declaration in '{}' "
+                "({})".format(name, var, fp, declared[name])
+            )
+
+    _check_dtypes(fp, container.to_pandas(), declared)
+
+
+def append_csv(fp, container, compression="infer", **kwargs):
+    """
+    Append the rows of a container to a metacsv file
+
+    Only the header and the column header line of the file are read. The
+    columns and index names of container must match those of the file, its
+    coords must match the file's coords, and its variables must be declared
+    identically in the file's header. attrs of the container are ignored.
+
+    Parameters
+    ----------
+
+    fp : str
+
+        Path to a metacsv-formatted csv
+
+    container : object
+
+        A metacsv or pandas Series or DataFrame
+
+    compression : str
+
+        Compression of fp (see :py:func:`metacsv.read_csv`). Compressed
+        rows are appended as a new gzip member, bz2, xz, or zstd stream,
+        which all readers decompress as one file.
+
+    **kwargs :
+
+        passed to pandas.to_csv. These should match the options the file
+        was written with (e.g. ``sep``). ``workers`` formats the rows in
+        parallel as in :py:meth:`metacsv.DataFrame.to_csv`.
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        >>> import metacsv, pandas as pd
+        >>> df = metacsv.DataFrame(
+        ...     pd.DataFrame({'pop': [1.0]}, index=pd.Index([2000], name='year')),
+        ...     coords={'year': None})
+        >>> df.to_csv('my-metacsv-data.csv')
+        >>> metacsv.append_csv('my-metacsv-data.csv', pd.DataFrame(
+        ...     {'pop': [2.0]}, index=pd.Index([2001], name='year')))
+        >>> metacsv.read_csv('my-metacsv-data.csv').index.tolist()
+        [2000, 2001]
+
+        >>> import os
+        >>> os.remove('my-metacsv-data.csv')
+
+    """
+
+    from .converters import _coerce_to_metacsv
+
+    if not isinstance(fp, string_types):
+        raise ValueError("append_csv requires a file path")
+
+    compression = infer_compression(fp, compression)
+    container = _coerce_to_metacsv(container)
+    data = container.to_pandas()
+
+    kwargs = dict(kwargs)
+    header = kwargs.pop("header", True)
+    expected = _column_header(data, dict(kwargs, header=header))
+
+    index = load_index(fp)
+
+    with _open_data(fp, compression=compression) as f:
+        file_header, offset = _read_path_header(fp, f=f)
+        written = [
+            f.readline().decode("utf-8").rstrip("\r\n")
+            for _ in range(expected.count("\n"))
+        ]
+
+        # a file written by MetaCSVWriter without any chunks has no column
+        # header line yet
+        empty = f.tell() == offset and not f.read(1)
+
+    if not empty and written != expected.splitlines():
+        raise ValueError(
+            "Columns of the appended data {} do not match those of '{}' "
+            "{}".format(expected.splitlines(), fp, written)
+        )
+
+    _, file_coords, file_variables = _special_to_properties(
+        _get_special_attributes(file_header, {})
+    )
+    _check_compatible(fp, container, file_coords, file_variables)
+
+    # pandas ends every row with a line terminator, but a file edited by hand
+    # may not end with one
+    missing_newline = False
+    if compression is None and not empty:
+        with open(fp, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            missing_newline = f.read(1) != b"\n"
+
+    with open_compressed(fp, "a", compression=compression) as f:
+        if missing_newline:
+            f.write("\n")
+
+        _container_to_csv_object(
+            container, f, header=header if empty else False, **kwargs
+        )
+
+    # the rows are already written, so a failure to index them only leaves
+    # the file without a current index
+    if index is not None:
+        try:
+            extend_index(
+                fp, index, compression=compression, **_dialect_kwargs(kwargs)
+            )
+        except Exception as e:
+            warnings.warn(
+                "Appended rows to '{}' but could not update its index: "
+                "{}".format(fp, e)
+            )
@@ -1,10 +1,17 @@
 # Big thanks to http://stackoverflow.com/a/21912744/3888719
 
 import yaml
+import threading
 from collections import OrderedDict
 
+# use the libyaml bindings when PyYAML was built with them
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
 
-def ordered_load(stream, Loader=yaml.SafeLoader, object_pairs_hook=OrderedDict):
+
+def _make_ordered_loader(Loader, object_pairs_hook=OrderedDict):
     class OrderedLoader(Loader):
         pass
 
@@ -15,10 +22,10 @@ def ordered_load(stream, Loader=yaml.SafeLoader, object_pairs_hook=OrderedDict):
     OrderedLoader.add_constructor(
         yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, construct_mapping
     )
-    return yaml.load(stream, OrderedLoader)
+    return OrderedLoader
 
 
-def ordered_dump(data, stream=None, Dumper=yaml.SafeDumper, **kwds):
+def _make_ordered_dumper(Dumper):
     class OrderedDumper(Dumper):
         pass
 
@@ -28,4 +35,40 @@ def ordered_dump(data, stream=None, Dumper=yaml.SafeDumper, **kwds):
         )
 
     OrderedDumper.add_representer(OrderedDict, _dict_representer)
-    return yaml.dump(data, stream, OrderedDumper, **kwds)
+    return OrderedDumper
+
+
+# Loader and dumper classes are built once and reused. Constructors and
+# representers are registered on the class, and PyYAML creates a new loader
+# instance per document, so these are safe to share between threads.
+OrderedLoader = _make_ordered_loader(SafeLoader)
+OrderedDumper = _make_ordered_dumper(SafeDumper)
+
+_loaders = {(SafeLoader, OrderedDict): OrderedLoader}
+_dumpers = {SafeDumper: OrderedDumper}
+_lock = threading.Lock()
+
+
+def _get_loader(Loader, object_pairs_hook):
+    key = (Loader, object_pairs_hook)
+    if key not in _loaders:
+        with _lock:
+            if key not in _loaders:
+                _loaders[key] = _make_ordered_loader(Loader, object_pairs_hook)
+    return _loaders[key]
+
+
+def _get_dumper(Dumper):
+    if Dumper not in _dumpers:
+        with _lock:
+            if Dumper not in _dumpers:
+                _dumpers[Dumper] = _make_ordered_dumper(Dumper)
+    return _dumpers[Dumper]
+
+
+def ordered_load(stream, Loader=SafeLoader, object_pairs_hook=OrderedDict):
+    return yaml.load(stream, _get_loader(Loader, object_pairs_hook))
+
+
+def ordered_dump(data, stream=None, Dumper=SafeDumper, **kwds):
+    return yaml.dump(data, stream, _get_dumper(Dumper), **kwds)
@@ -45,7 +45,11 @@ if sys.argv[-1] == 'info':
 extras_require = {
     'xarray': [
         'xarray>=0.7',
-        'netCDF4']
+        'netCDF4'],
+    'zstd': [
+        'zstandard'],
+    'arrow': [
+        'pyarrow']
 }
 
 readme = open('README.rst').read()
@@ -12,6 +12,7 @@ from __future__ import (
 )
 
 import glob
+import io
 import os
 import xarray as xr
 import pandas as pd
@@ -20,6 +21,7 @@ import shutil
 import json
 import subprocess
 import locale
+import warnings
 import metacsv
 import pytest
 from metacsv._compat import text_type
@@ -57,6 +59,1105 @@ def test_read_csv(setup_env):
     assert (csv1.values == csv2.set_index("ind").values).all().all()
 
 
+def test_read_csv_engines(setup_env):
+    """CSV Test 1b: The default engine reads the same data as the python engine"""
+
+    for fname in ["test1.csv", "test6.csv"]:
+        fp = os.path.join(testdata_prefix, fname)
+        df1 = metacsv.read_csv(fp)
+        df2 = metacsv.read_csv(fp, engine="python")
+
+        assert (df1.to_pandas() == df2.to_pandas()).all().all()
+        assert df1.attrs == df2.attrs
+        assert df1.coords == df2.coords
+
+    # regex separators still fall back to the python engine
+    fp = os.path.join(testdata_prefix, "test1.csv")
+    df3 = metacsv.read_csv(fp, sep=r",\s*")
+    assert df3.shape == metacsv.read_csv(fp).shape
+
+    # types are inferred from whole columns, not per low_memory chunk
+    fp = os.path.join(test_tmp_prefix, "test_mixed_column.csv")
+    with open(fp, "w") as f:
+        f.write("---\nauthor: A Person\n...\na,b\n")
+        f.write("1,2\n" * 300000)
+        f.write("x,2\n")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        mixed = metacsv.read_csv(fp)
+
+    assert set(type(v) for v in mixed["a"].values) == set([str])
+    assert mixed["a"].iloc[-1] == "x"
+
+    fp = os.path.join(testdata_prefix, "test1.csv")
+
+    # as does delimiter sniffing
+    for kwargs in [{"sep": None}, {"delimiter": None}]:
+        df4 = metacsv.read_csv(fp, **kwargs)
+        assert (df4.to_pandas() == metacsv.read_csv(fp).to_pandas()).all().all()
+
+
+def test_header_scanner(setup_env):
+    """CSV Test 1c: Header fences are found across block boundaries"""
+
+    from metacsv.io.parsers import _scan_header
+
+    body = b"a,b\n1,2\n"
+    header = b"author: A Person\nnote: ends with... an ellipsis\n  ....x\n"
+    doc = b"\n  \r\n---\r\n" + header + b" ... \r\n" + body
+
+    for blocksize in [1, 2, 3, 7, 64, 1024]:
+        fp = io.BytesIO(doc)
+        found, offset = _scan_header(fp, blocksize=blocksize)
+        assert found == header
+        assert doc[offset:] == body
+
+    fp = io.BytesIO(body)
+    assert _scan_header(fp, blocksize=3) == (None, 0)
+
+    with pytest.raises(ValueError):
+        _scan_header(io.BytesIO(b"---\nauthor: me\n"), blocksize=4)
+
+    attrs, coords, variables = metacsv.read_header(io.BytesIO(doc))
+    assert attrs["author"] == "A Person"
+
+
+def test_read_csv_memory_map(setup_env):
+    """CSV Test 1d: Memory-mapped reads match buffered reads"""
+
+    for fname in ["test1.csv", "test2.csv", "test6.csv"]:
+        fp = os.path.join(testdata_prefix, fname)
+        df1 = metacsv.read_csv(fp)
+        df2 = metacsv.read_csv(fp, memory_map=True)
+
+        assert (df1.to_pandas() == df2.to_pandas()).all().all()
+        assert list(df1.attrs.items()) == list(df2.attrs.items())
+
+    # every engine, and the python engine picked for regex separators, can
+    # read from the mapping
+    engines = [{"engine": "c"}, {"engine": "python"}, {"sep": r",\s*"}]
+    try:
+        import pyarrow
+
+        if tuple(int(v) for v in pd.__version__.split(".")[:2]) >= (1, 4):
+            engines.append({"engine": "pyarrow"})
+    except ImportError:
+        pass
+
+    fp = os.path.join(testdata_prefix, "test6.csv")
+    df1 = metacsv.read_csv(fp)
+
+    for kwargs in engines:
+        df2 = metacsv.read_csv(fp, memory_map=True, **kwargs)
+        assert (df1.to_pandas() == df2.to_pandas()).all().all()
+
+    chunks = list(metacsv.read_csv(fp, memory_map=True, sep=r",\s*", chunksize=10))
+    assert sum(len(c) for c in chunks) == len(df1)
+
+
+def test_read_csv_chunks(setup_env):
+    """CSV Test 1e: Chunked reads share one parsed header"""
+
+    fp = os.path.join(testdata_prefix, "test6.csv")
+    df = metacsv.read_csv(fp)
+
+    for memory_map in [False, True]:
+        chunks = list(metacsv.read_csv(fp, chunksize=25, memory_map=memory_map))
+
+        assert [len(c) for c in chunks] == [25, 25, 10]
+        assert all(isinstance(c, metacsv.DataFrame) for c in chunks)
+        assert all(c.attrs is chunks[0].attrs for c in chunks)
+        assert all(c.variables is chunks[0].variables for c in chunks)
+        assert all(c.coords._coords is chunks[0].coords._coords for c in chunks)
+        assert chunks[0].coords == df.coords
+
+        combined = pd.concat([c.to_pandas() for c in chunks])
+        assert (combined == df.to_pandas()).all().all()
+
+    with open(fp, "r") as f:
+        chunks = list(metacsv.read_csv(f, chunksize=50))
+
+    assert chunks[0].attrs == df.attrs
+    assert sum(len(c) for c in chunks) == len(df)
+
+
+def test_read_many(setup_env):
+    """CSV Test 1f: Read many files sharing a schema into one container"""
+
+    df = metacsv.read_csv(os.path.join(testdata_prefix, "test6.csv"))
+
+    paths = []
+    for i, ind0 in enumerate(["first", "second", "third"]):
+        part = df.xs(ind0, level="ind0", drop_level=False)
+        part.attrs = df.attrs.copy()
+        part.attrs["part"] = i
+        paths.append(os.path.join(test_tmp_prefix, "test_many_{}.csv".format(i)))
+        part.to_csv(paths[-1])
+
+    with pytest.warns(UserWarning, match="part"):
+        combined = metacsv.read_many(paths, workers=2)
+
+    assert combined.shape == (36, 2)
+    assert list(combined.coords) == list(df.coords)
+    assert combined.base_coords == df.base_coords
+    assert combined.attrs["source"] == df.attrs["source"]
+    assert "part" not in combined.attrs
+    assert combined.variables == df.variables
+
+    with pytest.warns(UserWarning):
+        tagged = metacsv.read_many(
+            os.path.join(test_tmp_prefix, "test_many_*.csv"),
+            workers=1,
+            source_coord="file",
+        )
+
+    assert tagged.index.names[0] == "file"
+    assert "file" in tagged.base_coords
+    assert (tagged.index.get_level_values("file") == paths[2]).sum() == 12
+
+    with pytest.raises(IOError):
+        metacsv.read_many(os.path.join(test_tmp_prefix, "no_such_*.csv"))
+
+
+def test_header_cache(setup_env):
+    """CSV Test 1g: Cached headers are reused until the file changes"""
+
+    tmpfile = os.path.join(test_tmp_prefix, "test_header_cache.csv")
+    shutil.copy(os.path.join(testdata_prefix, "test6.csv"), tmpfile)
+
+    cache = metacsv.HeaderCache(maxsize=2)
+
+    attrs, coords, variables = metacsv.read_header(tmpfile, header_cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    attrs["source"] = "modified by caller"
+    variables["col1"]["unit"] = "modified by caller"
+
+    attrs2, coords2, variables2 = metacsv.read_header(tmpfile, header_cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert attrs2["source"] == "Sample data for MetaCSV test"
+    assert variables2["col1"]["unit"] == "wigits"
+    assert coords2 == coords
+
+    df = metacsv.read_csv(tmpfile, header_cache=cache)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert (df.to_pandas() == metacsv.read_csv(tmpfile).to_pandas()).all().all()
+
+    df.attrs["source"] = "rewritten"
+    df.to_csv(tmpfile)
+    os.utime(tmpfile, (0, 0))
+
+    attrs3, _, _ = metacsv.read_header(tmpfile, header_cache=cache)
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert attrs3["source"] == "rewritten"
+    assert len(cache) == 1
+
+    for fname in ["test1.csv", "test5.csv"]:
+        metacsv.read_header(os.path.join(testdata_prefix, fname), header_cache=cache)
+
+    assert len(cache) == 2
+
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
+
+
+def test_yaml_loader_reuse(setup_env):
+    """CSV Test 1h: yaml loaders are built once and use libyaml if available"""
+
+    import yaml
+    from collections import OrderedDict
+    from metacsv.io import yaml_tools
+
+    if yaml.__with_libyaml__:
+        assert issubclass(yaml_tools.OrderedLoader, yaml.CSafeLoader)
+        assert issubclass(yaml_tools.OrderedDumper, yaml.CSafeDumper)
+
+    doc = "b: 1\na:\n  d: [x, y]\n  c: null\n"
+    loaded = yaml_tools.ordered_load(doc)
+    assert isinstance(loaded, OrderedDict)
+    assert list(loaded.keys()) == ["b", "a"]
+    assert list(loaded["a"].keys()) == ["d", "c"]
+    assert yaml_tools.ordered_load(doc, Loader=yaml.SafeLoader) == loaded
+
+    n_loaders = len(yaml_tools._loaders)
+    yaml_tools.ordered_load(doc, Loader=yaml.SafeLoader)
+    assert len(yaml_tools._loaders) == n_loaders
+
+    dumped = yaml_tools.ordered_dump(loaded, default_flow_style=False)
+    assert dumped == yaml_tools.ordered_dump(
+        loaded, Dumper=yaml.SafeDumper, default_flow_style=False
+    )
+
+
+def test_read_csv_lazy(setup_env):
+    """CSV Test 1i: Lazy reads parse the header now and the data on access"""
+
+    tmpfile = os.path.join(test_tmp_prefix, "test_lazy.csv")
+    shutil.copy(os.path.join(testdata_prefix, "test6.csv"), tmpfile)
+    df = metacsv.read_csv(tmpfile)
+
+    lazy = metacsv.read_csv(tmpfile, lazy=True)
+    assert not lazy.loaded
+    assert lazy.attrs == df.attrs
+    assert lazy.variables == df.variables
+    assert lazy.coords == df.coords
+    assert "not loaded" in repr(lazy)
+
+    lazy.attrs["note"] = "added before load"
+    assert not lazy.loaded
+
+    assert lazy.shape == df.shape
+    assert lazy.loaded
+    assert lazy.attrs["note"] == "added before load"
+    assert (lazy.values == df.values).all()
+    assert lazy.to_xarray().col1.attrs["unit"] == "wigits"
+    assert (metacsv.to_pandas(lazy) == df.to_pandas()).all().all()
+
+    lazy = metacsv.read_csv(tmpfile, lazy=True)
+    assert np.asarray(lazy).shape == df.shape
+    assert (np.asarray(lazy) == df.values).all()
+
+    lazy = metacsv.read_csv(tmpfile, lazy=True)
+    assert ((lazy * 2).values == (df * 2).values).all()
+    assert (lazy == df).all().all()
+    assert ((2 * lazy).values == (df * 2).values).all()
+
+    lazy = metacsv.read_csv(tmpfile, lazy=True)
+    lazy.coords = {"ind0": None, "ind1": None, "ind2": None, "ind3": None}
+    assert not lazy.loaded
+    assert "s1" not in lazy.coords
+    assert "s1" not in lazy.load().coords
+
+    lazy.coords = df.coords
+    assert "s1" in lazy.coords
+
+    with open(tmpfile, "r") as f:
+        lazy = metacsv.read_csv(f, lazy=True)
+        assert lazy.attrs == df.attrs
+        assert (lazy["col1"] == df["col1"]).all()
+
+    lazy = metacsv.read_csv(os.path.join(testdata_prefix, "test5.csv"), lazy=True)
+    assert metacsv.to_xarray(lazy).attrs["author"] == "series creator"
+
+    with pytest.raises(AssertionError):
+        metacsv.read_csv(tmpfile, lazy=True, assertions={"source": "other"})
+
+
+def test_read_csv_variables_projection(setup_env):
+    """CSV Test 1j: Read only requested variables and their coordinates"""
+
+    fp = os.path.join(testdata_prefix, "test6.csv")
+    df = metacsv.read_csv(fp)
+
+    col1 = metacsv.read_csv(fp, variables=["col1"])
+    assert list(col1.columns) == ["col1"]
+    assert list(col1.coords) == ["ind0", "ind1", "ind2", "ind3"]
+    assert list(col1.variables) == ["col1"]
+    assert (col1["col1"].values == df["col1"].values).all()
+    assert col1.to_xarray().col1.attrs["unit"] == "wigits"
+
+    s1 = metacsv.read_csv(fp, variables=["col2", "s1"])
+    assert list(s1.columns) == ["col2"]
+    assert set(s1.coords) == set(["ind0", "ind1", "ind2", "ind3", "s1"])
+    assert sorted(s1.coords["s1"]) == ["ind1", "ind2"]
+
+    plain = metacsv.read_csv(
+        os.path.join(testdata_prefix, "test9.csv"), variables="col2", index_col="ind1"
+    )
+    assert list(plain.columns) == ["col2"]
+    assert plain.index.name == "ind1"
+
+    with pytest.raises(ValueError):
+        metacsv.read_csv(fp, variables=["col1"], usecols=["col1"])
+
+    # positions in index_col would refer to the projected columns
+    for index_col in [0, [0, 1]]:
+        with pytest.raises(ValueError):
+            metacsv.read_csv(
+                os.path.join(testdata_prefix, "test9.csv"),
+                variables=["col2"],
+                index_col=index_col,
+            )
+
+
+def test_header_dtypes(setup_env):
+    """CSV Test 1k: dtypes declared in the header are used by the parser"""
+
+    tmpfile = os.path.join(test_tmp_prefix, "test_dtypes.csv")
+
+    df = metacsv.DataFrame(
+        {
+            "region": pd.Categorical(["USA", "CAN", "USA"]),
+            "pop": np.array([309.3, 34.0, 311.7], dtype="float32"),
+            "count": np.array([1, 2, 3], dtype="int16"),
+            "gdp": [13599.3, 1240.0, 13817.0],
+        },
+        index=pd.Index([2010, 2010, 2011], name="year"),
+        variables={"pop": "Population [millions]", "count": {"unit": "people"}},
+    )
+    df.add_coords()
+    df.to_csv(tmpfile)
+
+    attrs, coords, variables = metacsv.read_header(tmpfile)
+    assert variables["region"]["dtype"] == "category"
+    assert variables["pop"] == {
+        "description": "Population",
+        "unit": "millions",
+        "dtype": "float32",
+    }
+    assert variables["count"] == {"unit": "people", "dtype": "int16"}
+    assert "gdp" not in variables
+    assert "year" not in variables
+
+    # the container's own variables are left unchanged
+    assert df.variables["pop"] == "Population [millions]"
+
+    df2 = metacsv.read_csv(tmpfile)
+    assert (df2.dtypes == df.dtypes).all()
+    assert (df2.to_pandas() == df.to_pandas()).all().all()
+
+    df3 = metacsv.read_csv(tmpfile, dtype={"pop": "float64"})
+    assert df3["pop"].dtype == np.float64
+    assert df3["count"].dtype == np.int16
+
+    tmpheader = os.path.join(test_tmp_prefix, "test_dtypes.header")
+    df.to_header(tmpheader)
+    _, _, variables = metacsv.read_header(io.StringIO(open(tmpheader).read()))
+    assert variables["count"]["dtype"] == "int16"
+
+
+def test_categorical_coords(setup_env):
+    """CSV Test 1l: Coordinate columns can be parsed as categoricals"""
+
+    fp = os.path.join(testdata_prefix, "test6.csv")
+    df = metacsv.read_csv(fp)
+    cat = metacsv.read_csv(fp, categorical_coords=True)
+
+    for coord in df.coords:
+        level = cat.index.get_level_values(coord)
+        assert level.dtype.name == "category"
+        assert (level.astype(object) == df.index.get_level_values(coord)).all()
+
+    assert (cat.values == df.values).all()
+    assert cat.coords == df.coords
+
+    doc = io.StringIO(
+        "---\ncoords:\n  region:\n  year:\n...\n"
+        "region,year,pop\nUSA,2010,1\nUSA,2011,2\nCAN,2010,3\n"
+    )
+    df = metacsv.read_csv(doc, categorical_coords=True, dtype={"region": object})
+    assert df.index.get_level_values("region").dtype == object
+    assert list(df.index.get_level_values("year").categories) == [2010, 2011]
+    assert list(df.to_xarray().year.values) == [2010, 2011]
+
+    chunks = list(metacsv.read_csv(fp, categorical_coords=True, chunksize=20))
+    assert chunks[0].index.get_level_values("ind1").dtype.name == "category"
+
+
+@pytest.mark.parametrize("ext", [".gz", ".bz2", ".xz", ".zst"])
+def test_compressed_files(setup_env, ext):
+    """CSV Test 1m: Compressed files are read and written transparently"""
+
+    if ext == ".zst":
+        pytest.importorskip("zstandard")
+
+    df = metacsv.read_csv(os.path.join(testdata_prefix, "test6.csv"))
+    fp = os.path.join(test_tmp_prefix, "test_compressed.csv" + ext)
+    df.to_csv(fp)
+
+    with open(fp, "rb") as f:
+        assert not f.read(3).startswith(b"---")
+
+    df2 = metacsv.read_csv(fp)
+    assert (df2.values == df.values).all()
+    assert (df2.index == df.index).all()
+    assert df2.coords == df.coords
+    assert list(df2.attrs.items()) == list(df.attrs.items())
+
+    attrs, coords, variables = metacsv.read_header(fp)
+    assert list(attrs.items()) == list(df.attrs.items())
+
+    lazy = metacsv.read_csv(fp, lazy=True, header_cache=metacsv.HeaderCache())
+    assert (lazy.values == df.values).all()
+
+    chunks = list(metacsv.read_csv(fp, chunksize=20))
+    assert sum(len(chunk) for chunk in chunks) == len(df)
+
+    plain = os.path.join(test_tmp_prefix, "test_compressed_plain" + ext)
+    df.to_csv(plain, compression=None)
+    assert (metacsv.read_csv(plain, compression=None).values == df.values).all()
+
+
+def test_compressed_header_is_streamed(setup_env):
+    """CSV Test 1n: Reading a compressed header does not inflate the body"""
+
+    np.random.seed(0)
+    df = metacsv.DataFrame(
+        pd.DataFrame(np.random.random((20000, 4)), columns=list("ABCD")),
+        attrs={"author": "A Person"},
+    )
+
+    fp = os.path.join(test_tmp_prefix, "test_streamed.csv.gz")
+    df.to_csv(fp)
+
+    # a truncated file can only be read up to the point where it was cut
+    with open(fp, "rb") as f:
+        data = f.read()
+    with open(fp, "wb") as f:
+        f.write(data[: len(data) // 2])
+
+    attrs, coords, variables = metacsv.read_header(fp)
+    assert attrs["author"] == "A Person"
+
+    with pytest.raises(EOFError):
+        metacsv.read_csv(fp)
+
+
+def test_row_index(setup_env):
+    """CSV Test 1o: A sidecar row index lets read_csv seek to a row window"""
+
+    df = metacsv.DataFrame(
+        pd.DataFrame({"ind": np.arange(1003), "val": np.arange(1003) * 0.5}),
+        attrs={"author": "A Person"},
+    ).set_index("ind")
+    df.coords = {"ind": None}
+
+    fp = os.path.join(test_tmp_prefix, "test_row_index.csv")
+    df.to_csv(fp, row_index=7)
+
+    index = metacsv.io.sidecar.load_index(fp)
+    assert index.nrows == len(df)
+    assert len(index.offsets) == 144
+
+    for rows in [slice(0, 10), slice(6, 8), slice(500, 600), slice(1000, None)]:
+        window = metacsv.read_csv(fp, rows=rows)
+        assert (window.index == df.index[rows]).all()
+        assert (window.val == df.val[rows]).all()
+        assert window.attrs["author"] == "A Person"
+
+    assert (metacsv.read_csv(fp, rows=slice(-3, None)).index == [1000, 1001, 1002]).all()
+
+    lazy = metacsv.read_csv(fp, rows=slice(20, 30), lazy=True)
+    assert (lazy.index == df.index[20:30]).all()
+
+    chunks = list(metacsv.read_csv(fp, rows=slice(20, 30), chunksize=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert chunks[0].index[0] == 20
+
+    # the python engine, also picked for regex separators, reads the window
+    # through the same stream
+    for kwargs in [{"engine": "python"}, {"sep": r",\s*"}]:
+        window = metacsv.read_csv(fp, rows=slice(35, 38), **kwargs)
+        assert (window.index == [35, 36, 37]).all()
+        assert (window.val == df.val[35:38]).all()
+
+    # a file that changed since it was indexed is read without the index
+    df.iloc[:500].to_csv(fp)
+    assert metacsv.io.sidecar.load_index(fp) is None
+    assert (metacsv.read_csv(fp, rows=slice(6, 8)).index == [6, 7]).all()
+
+    with pytest.raises(ValueError):
+        metacsv.read_csv(fp, rows=slice(-3, None))
+
+    with open(fp) as f:
+        doc = io.StringIO(f.read())
+    assert (metacsv.read_csv(doc, rows=slice(6, 8)).index == [6, 7]).all()
+
+
+def test_where_block_stats(setup_env):
+    """CSV Test 1p: Block statistics let read_csv skip non-matching blocks"""
+
+    np.random.seed(1)
+    df = metacsv.DataFrame(
+        pd.DataFrame(
+            {
+                "year": np.repeat(np.arange(2000, 2100), 10),
+                "region": np.tile(list("ABCDE"), 200),
+                "pop": np.random.random(1000),
+            }
+        )
+    ).set_index(["year", "region"])
+    df.coords = {"year": None, "region": None}
+
+    fp = os.path.join(test_tmp_prefix, "test_where.csv")
+    df.to_csv(fp, row_index=50)
+
+    index = metacsv.io.sidecar.load_index(fp)
+    assert index.stats["year"][0] == [2000, 2004]
+    assert index.stats["region"][0] == ["A", "E"]
+
+    runs = index.match_blocks({"year": (2050, 2059)})
+    assert [(start, nrows) for _, start, nrows in runs] == [(500, 100)]
+    assert index.match_blocks({"year": 1990}) == []
+
+    full = df.to_pandas()
+    years = full.index.get_level_values("year")
+    regions = full.index.get_level_values("region")
+
+    cases = [
+        ({"year": (2050, 2059)}, (years >= 2050) & (years <= 2059)),
+        ({"year": (2095, None)}, years >= 2095),
+        ({"year": 2010, "region": ["B", "D"]}, (years == 2010) & regions.isin(list("BD"))),
+        ({"year": 1990}, years == 1990),
+    ]
+
+    for where, mask in cases:
+        subset = metacsv.read_csv(fp, where=where)
+        assert (subset.index == full.index[mask]).all()
+        assert np.allclose(subset["pop"].values, full["pop"].values[mask])
+        assert subset.coords == df.coords
+
+    # the python engine reads runs of blocks through the same stream
+    subset = metacsv.read_csv(fp, engine="python", where={"year": (2050, 2059)})
+    assert (subset.index == full.index[(years >= 2050) & (years <= 2059)]).all()
+
+    lazy = metacsv.read_csv(fp, where={"year": (2050, 2059)}, lazy=True)
+    assert len(lazy) == 100
+
+    with open(fp) as f:
+        doc = io.StringIO(f.read())
+    assert len(metacsv.read_csv(doc, where={"year": (2050, 2059)})) == 100
+
+    with pytest.raises(ValueError):
+        metacsv.read_csv(fp, where={"year": 2050}, chunksize=10)
+
+    # statistics are read with the separator the file was written with
+    fp = os.path.join(test_tmp_prefix, "test_where.tsv")
+    df.to_csv(fp, sep="\t", row_index=50)
+
+    index = metacsv.io.sidecar.load_index(fp)
+    assert index.stats["year"][0] == [2000, 2004]
+
+    subset = metacsv.read_csv(fp, sep="\t", where={"year": (2050, 2059)})
+    assert (subset.index == full.index[(years >= 2050) & (years <= 2059)]).all()
+
+
+def test_arrow(setup_env):
+    """CSV Test 1q: Arrow tables keep the metacsv header in their schema"""
+
+    pa = pytest.importorskip("pyarrow")
+
+    fp = os.path.join(testdata_prefix, "test6.csv")
+    df = metacsv.read_csv(fp)
+
+    table = metacsv.read_arrow(fp)
+    assert isinstance(table, pa.Table)
+    assert table.num_rows == len(df)
+    assert b"metacsv.attrs" in table.schema.metadata
+    assert b"metacsv.variable" in table.schema.field("col1").metadata
+
+    df2 = metacsv.from_arrow(table)
+    assert (df2.to_pandas() == df.to_pandas()).all().all()
+    assert df2.coords == df.coords
+    assert list(df2.attrs.items()) == list(df.attrs.items())
+    assert list(df2.variables.items()) == list(df.variables.items())
+
+    df3 = metacsv.from_arrow(df.to_arrow())
+    assert (df3.to_pandas() == df.to_pandas()).all().all()
+    assert df3.coords == df.coords
+
+    with open(fp) as f:
+        table = metacsv.read_arrow(f, attrs={"note": "buffer"})
+    assert metacsv.from_arrow(table).attrs["note"] == "buffer"
+
+    with pytest.raises(AssertionError):
+        metacsv.read_arrow(fp, assertions={"source": "another source"})
+
+
+def test_parquet(setup_env):
+    """CSV Test 1r: Parquet files keep attrs, coords, and variables"""
+
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    df = metacsv.read_csv(os.path.join(testdata_prefix, "test6.csv"))
+    fp = os.path.join(test_tmp_prefix, "test6.parquet")
+    df.to_parquet(fp)
+
+    assert b"metacsv.attrs" in pq.ParquetFile(fp).metadata.metadata
+
+    df2 = metacsv.read_parquet(fp)
+    assert (df2.to_pandas() == df.to_pandas()).all().all()
+    assert df2.coords == df.coords
+    assert list(df2.attrs.items()) == list(df.attrs.items())
+    assert list(df2.variables.items()) == list(df.variables.items())
+
+    projected = metacsv.read_parquet(fp, variables=["col1"])
+    assert list(projected.columns) == ["col1"]
+    assert list(projected.variables) == ["col1"]
+    assert projected.base_coords == df.base_coords
+
+    with pytest.raises(AssertionError):
+        metacsv.read_parquet(fp, assertions={"source": "another source"})
+
+    years = metacsv.DataFrame(
+        pd.DataFrame(
+            {"year": np.repeat(np.arange(2000, 2100), 10), "v": np.arange(1000)}
+        ),
+        coords={"year": None},
+    )
+    fp = os.path.join(test_tmp_prefix, "test_years.parquet")
+    years.to_parquet(fp, row_group_size=100)
+
+    from metacsv.io.parquet import _match_row_groups
+
+    assert _match_row_groups(pq.ParquetFile(fp), {"year": (2050, 2054)}) == [5]
+
+    subset = metacsv.read_parquet(fp, where={"year": (2050, 2054)})
+    assert list(subset.index.unique()) == [2050, 2051, 2052, 2053, 2054]
+    assert (subset.v.values == np.arange(500, 550)).all()
+    assert subset.coords == years.coords
+
+    assert len(metacsv.read_parquet(fp, where={"year": 1990})) == 0
+
+
+def test_binary_cache(setup_env, monkeypatch):
+    """CSV Test 1s: Parsed files are cached in a binary sidecar file"""
+
+    pytest.importorskip("pyarrow")
+
+    fp = os.path.join(test_tmp_prefix, "test_binary_cache.csv")
+    shutil.copy(os.path.join(testdata_prefix, "test6.csv"), fp)
+
+    df = metacsv.read_csv(fp, cache=True)
+    assert os.path.isfile(fp + ".mccache")
+
+    calls = []
+    read_csv = pd.read_csv
+
+    def counting_read_csv(*args, **kwargs):
+        calls.append(1)
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", counting_read_csv)
+
+    cached = metacsv.read_csv(fp, cache=True)
+    assert len(calls) == 0
+    assert (cached.to_pandas() == df.to_pandas()).all().all()
+    assert list(cached.dtypes) == list(df.dtypes)
+    assert cached.coords == df.coords
+    assert list(cached.attrs.items()) == list(df.attrs.items())
+    assert list(cached.variables.items()) == list(df.variables.items())
+
+    # different read options are not served from the cache
+    projected = metacsv.read_csv(fp, cache=True, variables=["col1"])
+    assert len(calls) == 1
+    assert list(projected.columns) == ["col1"]
+
+    # nor is a file which changed since it was cached
+    df.attrs["source"] = "rewritten"
+    df.to_csv(fp)
+    os.utime(fp, (0, 0))
+    assert metacsv.read_csv(fp, cache=True).attrs["source"] == "rewritten"
+    assert len(calls) == 2
+
+    with pytest.raises(ValueError):
+        metacsv.read_csv(fp, cache=True, chunksize=10)
+
+    # data which arrow cannot store is returned without a cache
+    fp = os.path.join(test_tmp_prefix, "test_binary_cache_mixed.csv")
+    pd.DataFrame({"x": [1, 2]}).to_csv(fp, index=False)
+
+    def mixed(value):
+        return int(value) if value == "1" else value
+
+    with pytest.warns(UserWarning):
+        df = metacsv.read_csv(fp, cache=True, converters={"x": mixed})
+
+    assert df.x.tolist() == [1, "2"]
+    assert not os.path.exists(fp + ".mccache")
+
+
+def test_pickle(setup_env):
+    """CSV Test 1t: Pickled containers keep their metadata"""
+
+    from metacsv.io import pickle_tools
+
+    df = metacsv.read_csv(os.path.join(testdata_prefix, "test6.csv"))
+    fp = os.path.join(test_tmp_prefix, "test6.pkl")
+    df.to_pickle(fp)
+
+    df2 = metacsv.read_pickle(fp, assertions={"source": df.attrs["source"]})
+    assert isinstance(df2, metacsv.DataFrame)
+    assert (df2.to_pandas() == df.to_pandas()).all().all()
+    assert df2.coords == df.coords
+    assert list(df2.attrs.items()) == list(df.attrs.items())
+    assert list(df2.variables.items()) == list(df.variables.items())
+
+    with pytest.raises(AssertionError):
+        metacsv.read_pickle(fp, assertions={"source": "another source"})
+
+    series = metacsv.Series(np.arange(1000.0), attrs={"author": "A Person"})
+    payload, buffers = pickle_tools.dumps(series)
+    if pickle_tools.OUT_OF_BAND:
+        assert len(buffers) == 1
+        assert len(payload) < series.nbytes
+
+    restored = pickle_tools.loads(payload, buffers)
+    assert (restored == series).all()
+    assert restored.attrs["author"] == "A Person"
+
+    buf = io.BytesIO()
+    series.to_pickle(buf)
+    buf.seek(0)
+    assert (metacsv.read_pickle(buf) == series).all()
+
+    # older protocols write plain pickles
+    df.to_pickle(fp, protocol=4)
+    assert not pickle_tools.is_pickle_file(fp)
+    df2 = metacsv.read_pickle(fp)
+    assert isinstance(df2, metacsv.DataFrame)
+    assert list(df2.attrs.items()) == list(df.attrs.items())
+    assert pickle_tools.dumps(df, protocol=4)[1] == []
+
+    # compressed files are ordinary pickles which pandas can also read
+    for fp, compression in [
+        (os.path.join(test_tmp_prefix, "test6.pkl.gz"), "infer"),
+        (os.path.join(test_tmp_prefix, "test6.pkl"), "gzip"),
+    ]:
+        df.to_pickle(fp, compression=compression)
+        with open(fp, "rb") as f:
+            assert f.read(2) == b"\x1f\x8b"
+
+        df2 = metacsv.read_pickle(fp, compression="gzip")
+        assert isinstance(df2, metacsv.DataFrame)
+        assert list(df2.attrs.items()) == list(df.attrs.items())
+        assert (pd.read_pickle(fp, compression="gzip") == df.to_pandas()).all().all()
+
+    # pandas pickles are read into metacsv containers
+    df.to_pandas().to_pickle(fp)
+    assert isinstance(metacsv.read_pickle(fp), metacsv.DataFrame)
+
+
+def test_aio(setup_env, monkeypatch):
+    """CSV Test 1u: Coroutines run in an executor with bounded concurrency"""
+
+    import asyncio
+    import threading
+    import time
+    from metacsv import aio
+    from metacsv.io import parsers
+
+    fp = os.path.join(testdata_prefix, "test6.csv")
+    df = metacsv.read_csv(fp)
+
+    async def read_and_write():
+        df2 = await aio.read_csv(fp)
+        out = os.path.join(test_tmp_prefix, "test_aio.csv")
+        await aio.to_csv(df2, out)
+        return await aio.read_header(out)
+
+    attrs, coords, variables = asyncio.run(read_and_write())
+    assert list(attrs.items()) == list(df.attrs.items())
+    assert list(coords) == list(df.coords)
+
+    state = {"running": 0, "peak": 0}
+    lock = threading.Lock()
+    read_header = parsers.read_header
+
+    def slow_read_header(*args, **kwargs):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.01)
+        try:
+            return read_header(*args, **kwargs)
+        finally:
+            with lock:
+                state["running"] -= 1
+
+    monkeypatch.setattr(parsers, "read_header", slow_read_header)
+
+    async def many_headers():
+        return await asyncio.gather(*[aio.read_header(fp) for _ in range(40)])
+
+    aio.configure(concurrency=3)
+    try:
+        headers = asyncio.run(many_headers())
+    finally:
+        aio.configure(concurrency=aio.DEFAULT_CONCURRENCY)
+
+    assert len(headers) == 40
+    assert state["peak"] == 3
+
+    for kwargs in [{"lazy": True}, {"chunksize": 10}, {"iterator": True}]:
+        with pytest.raises(ValueError):
+            asyncio.run(aio.read_csv(fp, **kwargs))
+
+
+def test_streaming_writer(setup_env):
+    """CSV Test 1v: MetaCSVWriter writes the header once and appends chunks"""
+
+    df = metacsv.read_csv(os.path.join(testdata_prefix, "test6.csv"))
+    fp = os.path.join(test_tmp_prefix, "test_writer.csv")
+
+    with metacsv.MetaCSVWriter(fp) as writer:
+        for start in range(0, len(df), 25):
+            writer.write(df.iloc[start : start + 25])
+
+    assert writer.rows_written == len(df)
+
+    with open(fp) as f:
+        text = f.read()
+    assert text.count("---") == 1
+    assert text.count("ind0,ind1") == 1
+
+    df2 = metacsv.read_csv(fp)
+    assert (df2.to_pandas() == df.to_pandas()).all().all()
+    assert df2.coords == df.coords
+    assert list(df2.attrs.items()) == list(df.attrs.items())
+    assert list(df2.variables.items()) == list(df.variables.items())
+
+    # explicit header values take precedence over those of the chunks
+    buf = io.StringIO()
+    with metacsv.MetaCSVWriter(buf, attrs={"author": "A Person"}) as writer:
+        writer.write(pd.Series([1, 2], name="x"))
+        writer.write(pd.Series([3], name="x", index=[2]))
+
+        with pytest.raises(ValueError):
+            writer.write(pd.Series([4], name="y"))
+
+    buf.seek(0)
+    series = metacsv.read_csv(buf, index_col=0, squeeze=True)
+    assert list(series.values) == [1, 2, 3]
+    assert series.attrs["author"] == "A Person"
+
+    # header applies to the first chunk only
+    buf = io.StringIO()
+    with metacsv.MetaCSVWriter(buf, header=["value"]) as writer:
+        writer.write(pd.Series([1, 2], name="x"))
+        writer.write(pd.Series([3], name="x", index=[2]))
+
+    buf.seek(0)
+    assert buf.read().splitlines() == [",value", "0,1", "1,2", "2,3"]
+
+
+def test_to_csv_without_copy(setup_env):
+    """CSV Test 1w: metacsv.to_csv writes without copying the data"""
+
+    import tracemalloc
+
+    np.random.seed(1)
+    df = metacsv.DataFrame(
+        pd.DataFrame(np.random.random((100000, 8)), columns=list("abcdefgh")),
+        attrs={"author": "A Person"},
+    )
+
+    shallow = df.copy(deep=False)
+    assert np.shares_memory(shallow["a"].values, df["a"].values)
+    assert shallow.attrs is not df.attrs
+    assert not np.shares_memory(df.copy()["a"].values, df["a"].values)
+
+    fp = os.path.join(test_tmp_prefix, "test_no_copy.csv")
+
+    tracemalloc.start()
+    try:
+        metacsv.to_csv(df, fp, attrs={"version": "1.0"}, chunksize=1000)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < df.values.nbytes / 2
+
+    df2 = metacsv.read_csv(fp, index_col=0)
+    assert df2.attrs["version"] == "1.0"
+    assert np.allclose(df2.values, df.values)
+
+    # overrides are applied to the written file only
+    assert "version" not in df.attrs
+
+    df = metacsv.DataFrame({"x": [1, 2], "y": [3.0, 4.0]}).set_index("x")
+    metacsv.to_csv(df, fp, coords={"x": None}, variables={"y": {"unit": "m"}})
+    assert len(df.coords) == 0
+    assert len(df.variables) == 0
+    assert metacsv.read_csv(fp).variables["y"]["unit"] == "m"
+
+
+def test_parallel_to_csv(setup_env):
+    """CSV Test 1x: to_csv with workers writes the same file as a serial write"""
+
+    n = 5003
+    np.random.seed(1)
+
+    # pandas formats a chunk of datetimes without times if all of its values
+    # are dates, so chunk boundaries must be preserved
+    df = metacsv.DataFrame(
+        pd.DataFrame(
+            {
+                "t": pd.to_datetime(
+                    ["2000-01-01"] * 3000 + ["2000-01-02 03:00"] * (n - 3000)
+                ),
+                "x": np.random.random(n),
+                "s": ["a,b"] * n,
+            },
+            index=pd.Index(np.arange(n), name="i"),
+        ),
+        attrs={"author": "A Person"},
+        coords={"i": None},
+    )
+
+    serial = os.path.join(test_tmp_prefix, "test_serial.csv")
+    parallel = os.path.join(test_tmp_prefix, "test_parallel.csv")
+
+    for kwargs in [{}, {"chunksize": 700}, {"chunksize": 700, "header": False}]:
+        df.to_csv(serial, **kwargs)
+        df.to_csv(parallel, workers=3, **kwargs)
+
+        with open(serial, "rb") as f1, open(parallel, "rb") as f2:
+            assert f1.read() == f2.read()
+
+    # binary handles get the blocks encoded as the serial writer would
+    plain = metacsv.DataFrame(df.to_pandas())
+    for encoding in ["utf-8", "latin-1"]:
+        buf1, buf2 = io.BytesIO(), io.BytesIO()
+        plain.to_csv(buf1, chunksize=700, encoding=encoding)
+        plain.to_csv(buf2, chunksize=700, encoding=encoding, workers=2)
+        assert buf1.getvalue() == buf2.getvalue()
+
+    metacsv.to_csv(df["x"], serial, chunksize=1000)
+    metacsv.to_csv(df["x"], parallel, chunksize=1000, workers=2)
+
+    with open(serial, "rb") as f1, open(parallel, "rb") as f2:
+        assert f1.read() == f2.read()
+
+
+def test_update_header(setup_env):
+    """CSV Test 1y: update_header rewrites the header without touching the data"""
+
+    np.random.seed(1)
+    df = metacsv.DataFrame(
+        pd.DataFrame({"t": np.arange(5000), "x": np.random.random(5000)}).set_index(
+            "t"
+        ),
+        attrs={"version": "1.0"},
+        coords={"t": None},
+    )
+
+    fp = os.path.join(test_tmp_prefix, "test_update_header.csv")
+    df.to_csv(fp, header_padding=100, row_index=1000)
+
+    with open(fp, "rb") as f:
+        original = f.read()
+
+    data_start = original.index(b"t,x")
+
+    # grows into the reserved padding
+    assert metacsv.update_header(fp, attrs={"version": "1.1", "note": "n" * 50})
+
+    with open(fp, "rb") as f:
+        updated = f.read()
+
+    assert len(updated) == len(original)
+    assert updated[data_start:] == original[data_start:]
+
+    df2 = metacsv.read_csv(fp, rows=slice(2000, 2003))
+    assert df2.attrs["version"] == "1.1"
+    assert list(df2.index) == [2000, 2001, 2002]
+
+    # too large for the padding, so the data is copied behind a new header
+    assert not metacsv.update_header(
+        fp, variables={"x": {"unit": "m"}}, attrs={"note": "n" * 500}
+    )
+
+    with open(fp, "rb") as f:
+        assert f.read().endswith(original[data_start:])
+
+    df2 = metacsv.read_csv(fp)
+    assert df2.attrs["version"] == "1.1"
+    assert df2.variables["x"]["unit"] == "m"
+    assert list(df2.coords) == ["t"]
+    assert np.allclose(df2.x.values, df.x.values)
+
+    # the row index is moved along with the data
+    assert metacsv.io.sidecar.load_index(fp) is not None
+    assert metacsv.read_csv(fp, rows=slice(2000, 2003)).index[0] == 2000
+
+    fp = os.path.join(test_tmp_prefix, "test_update_header.csv.gz")
+    df.to_csv(fp)
+    assert not metacsv.update_header(fp, attrs={"version": "2.0"})
+    assert metacsv.read_header(fp)[0]["version"] == "2.0"
+
+
+def test_append_csv(setup_env):
+    """CSV Test 1z: append_csv adds rows checked against the file's header"""
+
+    def make(start, stop):
+        return metacsv.DataFrame(
+            pd.DataFrame(
+                {"t": np.arange(start, stop), "x": np.arange(start, stop) * 1.5}
+            ).set_index("t"),
+            attrs={"version": "1.0"},
+            coords={"t": None},
+            variables={"x": {"unit": "m"}},
+        )
+
+    fp = os.path.join(test_tmp_prefix, "test_append.csv")
+    make(0, 2500).to_csv(fp, row_index=1000)
+
+    metacsv.append_csv(fp, make(2500, 4200))
+
+    df = metacsv.read_csv(fp)
+    assert (df.index == np.arange(4200)).all()
+    assert np.allclose(df.x.values, np.arange(4200) * 1.5)
+    assert df.variables["x"]["unit"] == "m"
+
+    # the row index is extended as if it had been rebuilt
+    index = metacsv.io.sidecar.load_index(fp)
+    rebuilt = metacsv.build_index(fp, block_rows=1000)
+    assert index.offsets == rebuilt.offsets
+    assert index.stats == rebuilt.stats
+    assert metacsv.read_csv(fp, rows=slice(4000, 4002)).index.tolist() == [4000, 4001]
+
+    with pytest.raises(ValueError):
+        metacsv.append_csv(fp, make(0, 1).rename(columns={"x": "y"}))
+
+    conflicting = make(0, 1)
+    conflicting.variables = {"x": {"unit": "km"}}
+    with pytest.raises(ValueError):
+        metacsv.append_csv(fp, conflicting)
+
+    # values the declared dtype cannot hold are rejected before writing
+    fp = os.path.join(test_tmp_prefix, "test_append_dtype.csv")
+    narrow = make(0, 3)
+    narrow["x"] = narrow.x.astype("int16")
+    narrow.to_csv(fp)
+    for x in [[0.5], [np.nan], [40000]]:
+        with pytest.raises(ValueError):
+            metacsv.append_csv(
+                fp, pd.DataFrame({"x": x}, index=pd.Index([3], name="t"))
+            )
+
+    metacsv.append_csv(fp, pd.DataFrame({"x": [7.0]}, index=pd.Index([3], name="t")))
+    assert metacsv.read_csv(fp).x.tolist() == [0, 1, 3, 7]
+
+    # the index of a file with another separator is extended with it
+    fp = os.path.join(test_tmp_prefix, "test_append.tsv")
+    make(0, 2500).to_csv(fp, sep="\t")
+    metacsv.build_index(fp, block_rows=1000, stats=["x"], sep="\t")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        metacsv.append_csv(fp, make(2500, 4200), sep="\t")
+
+    index = metacsv.io.sidecar.load_index(fp)
+    rebuilt = metacsv.build_index(fp, block_rows=1000, stats=["x"], sep="\t")
+    assert index is not None
+    assert index.stats == rebuilt.stats
+
+    fp = os.path.join(test_tmp_prefix, "test_append.csv.gz")
+    make(0, 3).to_csv(fp)
+    metacsv.append_csv(fp, make(3, 5).to_pandas())
+    assert metacsv.read_csv(fp).index.tolist() == [0, 1, 2, 3, 4]
+
+    # a file with no rows yet gets its column header from the first append
+    fp = os.path.join(test_tmp_prefix, "test_append_empty.csv")
+    with metacsv.MetaCSVWriter(fp, coords={"t": None}, variables={"x": {"unit": "m"}}):
+        pass
+
+    metacsv.append_csv(fp, make(0, 2))
+    assert metacsv.read_csv(fp).index.tolist() == [0, 1]
+
+
 def test_coordinate_conversion_to_xarray(setup_env):
     """CSV Test 2: Make sure only base coordinates are used in determining xarray dimensionality"""
 
@@ -482,6 +1583,36 @@ def test_assertions(setup_env):
     )
 
 
+def test_header_first_assertions(setup_env):
+    tmpfile = os.path.join(test_tmp_prefix, "test_bad_body.csv")
+    with open(tmpfile, "w") as f:
+        f.write("---\nversion: 1.0\n...\na,b\n1,2\n3,4,5,6\n")
+
+    # a failing assertion is raised before the malformed body is parsed
+    with pytest.raises(AssertionError):
+        metacsv.read_csv(tmpfile, assertions={"version": 2.0})
+
+    with pytest.raises(pd.errors.ParserError):
+        metacsv.read_csv(tmpfile, assertions={"version": 1.0})
+
+    paths = [
+        os.path.join(testdata_prefix, "test5.csv"),
+        os.path.join(testdata_prefix, "test6.csv"),
+        os.path.join(testdata_prefix, "test7.csv"),
+        tmpfile,
+    ]
+
+    failures = metacsv.validate_headers(
+        paths, {"version": lambda v: str(v).startswith("test5")}
+    )
+
+    assert list(failures.keys()) == paths[1:2] + paths[3:]
+    assert isinstance(failures[paths[1]], KeyError)
+
+    passing = metacsv.validate_headers(paths[:1], {"version": "test5.2016-05-01.01"})
+    assert len(passing) == 0
+
+
 def test_header_writer(setup_env):
     fp = os.path.join(testdata_prefix, "test9.csv")
 